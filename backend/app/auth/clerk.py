@@ -1,25 +1,25 @@
-import requests
 from jose import jwt
 from jose.exceptions import JWTError
 
-def verify_clerk_token(token: str):
+from app.auth.jwks import get_jwks_cache
+
+
+async def verify_clerk_token(token: str):
     try:
         # 1️⃣ Read unverified payload to get issuer
         unverified_payload = jwt.get_unverified_claims(token)
         issuer = unverified_payload["iss"]
 
-        # 2️⃣ Fetch JWKS from the ISSUER (not api.clerk.com)
-        jwks_url = f"{issuer}/.well-known/jwks.json"
-        jwks = requests.get(jwks_url).json()
-
-        # 3️⃣ Get key id from header
+        # 2️⃣ Get key id from header
         unverified_header = jwt.get_unverified_header(token)
         kid = unverified_header["kid"]
 
-        # 4️⃣ Match key
-        key = next(k for k in jwks["keys"] if k["kid"] == kid)
+        # 3️⃣ Signing key from the JWKS cache; unknown issuers are rejected
+        # here (fetched only for allowlisted issuers, on first use, expiry
+        # or key rotation)
+        key = await get_jwks_cache().get_key(issuer, kid)
 
-        # 5️⃣ Decode & verify
+        # 4️⃣ Decode & verify (local CPU work)
         payload = jwt.decode(
             token,
             key,
@@ -2,34 +2,16 @@
 
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer
-from jose import jwt
-import requests
+
+from app.auth.clerk import verify_clerk_token
 
 security = HTTPBearer()
 
-def get_current_user(credentials=Depends(security)):
+async def get_current_user(credentials=Depends(security)):
     token = credentials.credentials
 
     try:
-        unverified_claims = jwt.get_unverified_claims(token)
-        issuer = unverified_claims["iss"]
-
-        jwks_url = f"{issuer}/.well-known/jwks.json"
-        jwks = requests.get(jwks_url).json()
-
-        header = jwt.get_unverified_header(token)
-        kid = header["kid"]
-
-        key = next(k for k in jwks["keys"] if k["kid"] == kid)
-
-        payload = jwt.decode(
-            token,
-            key,
-            algorithms=["RS256"],
-            options={"verify_aud": False},
-        )
-
-        return payload
+        return await verify_clerk_token(token)
 
     except Exception as e:
         print("❌ JWT VERIFY ERROR:", repr(e))
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+
+import httpx
+
+from app.core.config import settings
+
+JWKSFetcher = Callable[[str], Awaitable[Dict]]
+
+
+class JWKSError(Exception):
+    """Signing key can't be resolved (unknown issuer/kid, fetch failure)."""
+
+
+async def fetch_jwks(issuer: str) -> Dict:
+    """Default fetcher: GET {issuer}/.well-known/jwks.json over async HTTP."""
+    async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
+        response = await client.get(f"{issuer.rstrip('/')}/.well-known/jwks.json")
+        response.raise_for_status()
+        return response.json()
+
+
+def static_jwks_fetcher(jwks_by_issuer: Dict[str, Dict]) -> JWKSFetcher:
+    """Local stand-in for Clerk (tests / offline dev): serves fixed key sets."""
+    async def fetch(issuer: str) -> Dict:
+        if issuer not in jwks_by_issuer:
+            raise JWKSError(f"No JWKS for issuer {issuer}")
+        return jwks_by_issuer[issuer]
+
+    return fetch
+
+
+class _Entry:
+    __slots__ = ("keys", "fetched_at")
+
+    def __init__(self, keys: Dict[str, Dict], fetched_at: float):
+        self.keys = keys
+        self.fetched_at = fetched_at
+
+
+class JWKSCache:
+    """
+    Signing keys per token issuer, so verifying a token is local CPU work.
+
+    - Only allowlisted issuers are trusted (tokens name their own issuer,
+      so without this anyone could point us at their own keys); with an
+      empty allowlist every token is rejected.
+    - Keys are kept for `ttl_s`; past `refresh_after_s` they are still
+      served while a background task refreshes them.
+    - An unknown `kid` (Clerk rotated its keys) triggers a refresh, at
+      most once per `min_refresh_interval_s` per issuer.
+    - Concurrent fetches for one issuer are coalesced.
+    """
+
+    def __init__(
+        self,
+        allowed_issuers: Sequence[str] = (),
+        ttl_s: float = 3600,
+        refresh_after_s: float = 2700,
+        min_refresh_interval_s: float = 30,
+        fetcher: JWKSFetcher = fetch_jwks,
+    ):
+        self.allowed_issuers = {issuer.rstrip("/") for issuer in allowed_issuers}
+        self.ttl_s = ttl_s
+        self.refresh_after_s = refresh_after_s
+        self.min_refresh_interval_s = min_refresh_interval_s
+        self.fetcher = fetcher
+
+        self._entries: Dict[str, _Entry] = {}
+        self._fetches: Dict[str, asyncio.Task] = {}
+        self._counters = {"hits": 0, "fetches": 0, "fetch_errors": 0, "rotations": 0, "rejected_issuers": 0}
+
+    def is_allowed(self, issuer: str) -> bool:
+        # Exact match only: a pattern like "clerk.*" would also match
+        # attacker-controlled hosts
+        return issuer.rstrip("/") in self.allowed_issuers
+
+    async def get_key(self, issuer: str, kid: str) -> Dict:
+        """JWK for (issuer, kid); raises JWKSError if it can't be resolved."""
+        issuer = issuer.rstrip("/")
+        if not self.is_allowed(issuer):
+            self._counters["rejected_issuers"] += 1
+            raise JWKSError(f"Issuer not allowed: {issuer}")
+
+        entry = self._entries.get(issuer)
+        now = time.monotonic()
+
+        if entry is None or now - entry.fetched_at > self.ttl_s:
+            entry = await self._refresh(issuer)
+        elif now - entry.fetched_at > self.refresh_after_s and issuer not in self._fetches:
+            # Serve the current keys, refresh ahead of expiry
+            self._start_refresh(issuer)
+
+        key = entry.keys.get(kid)
+        if key is None and time.monotonic() - entry.fetched_at >= self.min_refresh_interval_s:
+            self._counters["rotations"] += 1
+            entry = await self._refresh(issuer)
+            key = entry.keys.get(kid)
+
+        if key is None:
+            raise JWKSError(f"Unknown signing key '{kid}' for issuer {issuer}")
+
+        self._counters["hits"] += 1
+        return key
+
+    def _start_refresh(self, issuer: str) -> asyncio.Task:
+        task = self._fetches.get(issuer)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(issuer))
+            self._fetches[issuer] = task
+            task.add_done_callback(lambda _: self._fetches.pop(issuer, None))
+        return task
+
+    async def _refresh(self, issuer: str) -> _Entry:
+        return await asyncio.shield(self._start_refresh(issuer))
+
+    async def _fetch(self, issuer: str) -> _Entry:
+        self._counters["fetches"] += 1
+        try:
+            jwks = await self.fetcher(issuer)
+            keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+        except Exception as e:
+            self._counters["fetch_errors"] += 1
+            stale = self._entries.get(issuer)
+            if stale is not None:
+                # Keep verifying with the keys we have while Clerk is unreachable
+                print(f"JWKS refresh for {issuer} failed, keeping cached keys: {e}")
+                return stale
+            raise JWKSError(f"Could not fetch JWKS for {issuer}: {e}")
+
+        entry = _Entry(keys, time.monotonic())
+        self._entries[issuer] = entry
+        return entry
+
+    def stats(self) -> Dict:
+        return {**self._counters, "issuers": len(self._entries)}
+
+
+_cache: Optional[JWKSCache] = None
+
+
+def get_jwks_cache() -> JWKSCache:
+    """Process-wide cache configured from the CLERK_* settings."""
+    global _cache
+
+    if _cache is None:
+        issuers = [i.strip() for i in settings.CLERK_ISSUERS.split(",") if i.strip()]
+        if not issuers:
+            print("⚠️ CLERK_ISSUERS is not set: every Clerk token will be rejected")
+        _cache = JWKSCache(
+            allowed_issuers=issuers,
+            ttl_s=settings.CLERK_JWKS_TTL_S,
+            refresh_after_s=settings.CLERK_JWKS_TTL_S * 0.75,
+            min_refresh_interval_s=settings.CLERK_JWKS_MIN_REFRESH_S,
+        )
+    return _cache
@@ -10,6 +10,43 @@ class Settings(BaseSettings):
     AZURE_OPENAI_ENDPOINT: str
     AZURE_OPENAI_DEPLOYMENT: str
     AZURE_OPENAI_API_VERSION: str = "2024-06-01"
+    # Shared async client: HTTP pool size, default timeout, SDK retries
+    # (0: retries are done by the LLM governor below)
+    AZURE_OPENAI_MAX_CONNECTIONS: int = 20
+    AZURE_OPENAI_TIMEOUT_S: float = 60.0
+    AZURE_OPENAI_MAX_RETRIES: int = 0
+    # Outbound LLM governor, per deployment: local rate limits (match the
+    # deployment quota; 0 = unlimited), retry backoff, circuit breaker
+    LLM_REQUESTS_PER_MINUTE: int = 300
+    LLM_TOKENS_PER_MINUTE: int = 50000
+    WHISPER_REQUESTS_PER_MINUTE: int = 3
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE_S: float = 1.0
+    LLM_BACKOFF_MAX_S: float = 30.0
+    LLM_BREAKER_FAILURES: int = 5
+    LLM_BREAKER_RESET_S: float = 30.0
+    # Upload vision jobs left pending/running by a restart: re-run at startup
+    # if idle for VISION_JOB_STALE_MIN and younger than VISION_JOB_MAX_AGE_HOURS
+    VISION_JOB_STALE_MIN: float = 15
+    VISION_JOB_MAX_AGE_HOURS: float = 24
+    # Vision calls: max in flight per worker, per-call timeout
+    VISION_MAX_CONCURRENCY: int = 4
+    VISION_TIMEOUT_S: float = 45.0
+    # Vision payloads: resize to the model's tile resolution, re-encode, cache
+    VISION_IMAGE_MAX_LONG_SIDE: int = 2048
+    VISION_IMAGE_MAX_SHORT_SIDE: int = 768
+    VISION_IMAGE_QUALITY: int = 85
+    VISION_IMAGE_FORMAT: str = "JPEG"  # JPEG | WEBP
+    VISION_IMAGE_CACHE_MB: int = 64
+    # Persistent cache of vision analyses / comparisons (by image content hash)
+    VISION_CACHE_ENABLED: bool = True
+    VISION_CACHE_TTL_HOURS: float = 24 * 30
+    VISION_CACHE_PURGE_INTERVAL_HOURS: float = 6
+    # /skin/progress/comparison?enrich=true: pairs compared in parallel per
+    # request, per-pair timeout (a pair also waits on VISION_MAX_CONCURRENCY,
+    # and that wait counts against the timeout)
+    COMPARISON_ENRICH_CONCURRENCY: int = 4
+    COMPARISON_ENRICH_TIMEOUT_S: float = 60.0
     # Azure Speech Configuration
     AZURE_SPEECH_KEY: str
     AZURE_SPEECH_REGION: str
@@ -19,6 +56,57 @@ class Settings(BaseSettings):
     # Gemini API Key
     VITE_GEMINI_API_KEY: str
 
+    # Clerk token verification: accepted issuers, exact URLs, comma-separated
+    # (e.g. https://your-app.clerk.accounts.dev; empty = every token is
+    # rejected), JWKS cache lifetime, min gap between refreshes triggered by
+    # an unknown key id
+    CLERK_ISSUERS: str = ""
+    CLERK_JWKS_TTL_S: float = 3600
+    CLERK_JWKS_MIN_REFRESH_S: float = 30
+
+    # Skin inference backend: torch | onnx | onnx-int8
+    INFERENCE_BACKEND: str = "torch"
+    # Weight loading for the torch backend: copy | mmap (shared across workers)
+    MODEL_WEIGHTS_MODE: str = "copy"
+    # Default input resolution: fast | balanced | detailed | accurate (or pixels)
+    INFERENCE_RESOLUTION: str = "accurate"
+    # Skin inference micro-batching
+    INFERENCE_MAX_BATCH_SIZE: int = 8
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+    # Max images per /skin/infer/batch request
+    INFERENCE_BATCH_MAX_FILES: int = 100
+    # Images of one batch request decoded / in inference at a time
+    INFERENCE_BATCH_CONCURRENCY: int = 8
+    # Inference executor (0 torch threads = use every core)
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_TORCH_THREADS: int = 0
+    # Prediction cache (in-process LRU + optional Postgres tier)
+    PREDICTION_CACHE_MAX_ENTRIES: int = 2048
+    PREDICTION_CACHE_PERSISTENT: bool = False
+    # Postgres tier bounds: row cap (oldest trimmed first) and row lifetime
+    PREDICTION_CACHE_PERSISTENT_MAX_ROWS: int = 100000
+    PREDICTION_CACHE_PERSISTENT_TTL_DAYS: float = 30
+
+    # Convert legacy weekly report metrics in the background at startup
+    REPORT_METRICS_BACKFILL: bool = True
+    # Store rendered HTML per report (default: render on demand from the JSON fields)
+    REPORT_STORE_HTML: bool = False
+    # Absolute public API origin for linking the report stylesheet from
+    # /static; empty = inline the CSS (the frontend renders report HTML on
+    # its own origin, where a relative link would not resolve)
+    REPORT_ASSETS_BASE_URL: str = ""
+    # PDF export: render processes, storage directory
+    REPORT_PDF_WORKERS: int = 2
+    REPORT_PDF_DIR: str = "uploads/reports"
+    # /reports/range: max weeks per request, concurrent generations of missing weeks
+    REPORT_RANGE_MAX_WEEKS: int = 26
+    REPORT_RANGE_CONCURRENCY: int = 4
+    # Pre-generate last week's reports for active users (hourly sweep, resumable)
+    REPORT_PREGEN_ENABLED: bool = True
+    REPORT_PREGEN_CONCURRENCY: int = 2
+    REPORT_PREGEN_INTERVAL_MIN: float = 60
+    REPORT_PREGEN_LOOKBACK_WEEKS: int = 1
+
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignore extra fields from .env (like VITE_ prefixed vars for frontend)
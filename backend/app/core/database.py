@@ -1,3 +1,6 @@
+import asyncio
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -22,6 +25,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Pool warm-up (used by the /ready probe)
+async def warm_up_pool(connections: int = 2):
+    """Open `connections` pooled connections concurrently and ping each."""
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
 # Base class for models
 Base = declarative_base()
 
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Float, LargeBinary, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.entities.base import Base
+
+class SkinPredictionCache(Base):
+    __tablename__ = "skin_prediction_cache"
+
+    # "<model_version>:<backend>:<resolution>:<sha256 of decoded pixels>"
+    cache_key = Column(String, primary_key=True)
+    model_version = Column(String, nullable=False, index=True)
+    prediction = Column(String, nullable=False)
+    confidence = Column(Float, nullable=False)
+    probabilities = Column(JSONB)  # {label: probability}, same as an in-memory hit
+    embedding = Column(LargeBinary)  # float16 backbone embedding
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, LargeBinary, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.entities.base import Base
+
+class SkinEmbedding(Base):
+    __tablename__ = "skin_embeddings"
+
+    # One DINOv2 backbone embedding per image (float16 bytes, see app/models/embeddings.py)
+    skin_image_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("skin_images.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    backbone_version = Column(String, nullable=False)
+    resolution = Column(Integer, nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, ForeignKey, Float, Text, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.entities.base import Base
+
+class SkinVisionAnalysis(Base):
+    __tablename__ = "skin_vision_analyses"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    skin_image_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("skin_images.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+
+    status = Column(String, nullable=False, default="pending")  # pending, running, completed, failed
+    error = Column(Text)
+
+    # Azure Vision output
+    condition = Column(String)
+    severity = Column(String)  # mild, moderate, severe
+    severity_score = Column(Float)
+    affected_area_percentage = Column(Float)
+    redness_level = Column(Float)
+    texture_roughness = Column(Float)
+    description = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    # Last status change; the startup sweep uses it to find abandoned jobs
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
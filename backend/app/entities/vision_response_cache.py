@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.entities.base import Base
+
+class VisionResponseCache(Base):
+    __tablename__ = "vision_response_cache"
+
+    # sha256 of (kind, image hashes, prompt version, deployment)
+    cache_key = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)  # 'analysis', 'comparison'
+
+    # Content hashes of the image file(s), used for invalidation on delete
+    image_hash = Column(String, nullable=False, index=True)
+    other_image_hash = Column(String, index=True)
+
+    prompt_version = Column(String, nullable=False)
+    deployment = Column(String, nullable=False)
+    response = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
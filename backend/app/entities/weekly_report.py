@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Date, DateTime, Text
+from sqlalchemy import Column, String, ForeignKey, Date, DateTime, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
@@ -7,6 +7,10 @@ from app.entities.base import Base
 
 class WeeklyReport(Base):
     __tablename__ = "weekly_reports"
+    # One report per user and week (see update_db.py for existing databases)
+    __table_args__ = (
+        Index("uq_weekly_reports_user_week", "user_id", "week_start", unique=True),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -21,14 +25,17 @@ class WeeklyReport(Base):
     
     # Report content
     report_text = Column(Text, nullable=False)  # Plain text summary
-    report_html = Column(Text)  # Rich HTML for in-app display
+    report_html = Column(Text)  # Only with REPORT_STORE_HTML; otherwise rendered on demand
     report_pdf_url = Column(Text)  # URL to PDF file
     
     # Structured data
+    report_title = Column(Text)
     condition_summary = Column(Text)  # AI-generated summary
     key_insights = Column(JSONB)  # Array of insights
     recommendations = Column(JSONB)  # Array of recommendations
     metrics = Column(JSONB)  # Week metrics as JSON
+    metrics_interpretation = Column(Text)
+    next_steps = Column(Text)
     
     # Metadata
     generated_by = Column(String, default="azure-gpt-4o")
@@ -1,11 +1,20 @@
+import asyncio
 import os
 from fastapi import FastAPI
 from app.routers import skin, mood, voice, analytics, reports, user_engagement
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.auth import routes
+from app.core.config import settings
+from app.core.database import warm_up_pool
+from app.services.report_renderer import STATIC_DIR
+from app.services.report_scheduler import WeeklyReportScheduler
+from app.utils.azure_openai import close_async_client
+from app.utils.llm_governor import governor_stats
+from app.models.inference import get_inference_stats, get_model_status, is_model_ready, warm_up_model
 
 app = FastAPI(
     title="Dermora Backend",
@@ -35,6 +44,12 @@ app.mount(
     StaticFiles(directory=UPLOADS_DIR),
     name="skin_images"
 )
+# Shared assets (report stylesheet) referenced by rendered HTML
+app.mount(
+    "/static",
+    StaticFiles(directory=STATIC_DIR),
+    name="static"
+)
 app.include_router(routes.router)
 app.include_router(skin.router)
 app.include_router(mood.router)
@@ -44,11 +59,138 @@ app.include_router(reports.router)
 app.include_router(user_engagement.router)
 
 
+# ============================================================================
+# STARTUP WARM-UP / READINESS
+# ============================================================================
+
+_readiness = {"db": False, "db_error": None}
+_background_tasks = set()
+
+
+_named_tasks = {}
+
+
+def _spawn(coro):
+    # Keep a reference so the task isn't garbage-collected mid-flight
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _spawn_once(name, make_coro):
+    """Start `make_coro()` unless a task with this name is still running."""
+    task = _named_tasks.get(name)
+    if task is None or task.done():
+        _named_tasks[name] = _spawn(make_coro())
+
+
+async def _warm_up_db():
+    try:
+        await warm_up_pool()
+        _readiness["db"] = True
+        _readiness["db_error"] = None
+    except Exception as e:
+        _readiness["db_error"] = repr(e)
+        print(f"DB warm-up failed: {e}")
+
+
+async def _warm_up_model():
+    try:
+        await warm_up_model()
+    except Exception as e:
+        print(f"Model warm-up failed: {e}")
+
+
+report_scheduler = WeeklyReportScheduler(
+    generate=reports.pregenerate_report,
+    is_available=reports.report_generator.is_available,
+    concurrency=settings.REPORT_PREGEN_CONCURRENCY,
+    interval_s=settings.REPORT_PREGEN_INTERVAL_MIN * 60,
+    lookback_weeks=settings.REPORT_PREGEN_LOOKBACK_WEEKS,
+)
+
+
+async def _backfill_report_metrics():
+    try:
+        updated = await reports.backfill_report_metrics()
+        if updated:
+            print(f"Backfilled metrics on {updated} weekly reports")
+    except Exception as e:
+        print(f"Report metrics backfill failed: {e}")
+
+
+async def _recover_vision_jobs():
+    try:
+        summary = await skin.vision_jobs.recover_stale(
+            skin.url_to_filesystem_path,
+            stale_after_s=settings.VISION_JOB_STALE_MIN * 60,
+            max_age_s=settings.VISION_JOB_MAX_AGE_HOURS * 3600,
+        )
+        if summary["requeued"] or summary["failed"]:
+            print(f"Recovered stale vision jobs: {summary}")
+    except Exception as e:
+        print(f"Vision job recovery failed: {e}")
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Run in the background so uvicorn binds immediately; /ready gates traffic
+    _spawn(_warm_up_db())
+    _spawn(_warm_up_model())
+    _spawn(_recover_vision_jobs())
+    if settings.VISION_CACHE_ENABLED:
+        _spawn(skin.vision_service.cache.run_purge_forever(
+            settings.VISION_CACHE_PURGE_INTERVAL_HOURS * 3600
+        ))
+    if settings.REPORT_METRICS_BACKFILL:
+        _spawn_once("report-metrics-backfill", _backfill_report_metrics)
+    if settings.REPORT_PREGEN_ENABLED:
+        _spawn_once("report-pregeneration", report_scheduler.run_forever)
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    for task in list(_background_tasks):
+        task.cancel()
+    reports.report_pdf_service.shutdown()
+    await close_async_client()
+
+
 @app.get("/")
 async def home():
     return {"status: ok"}
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up and serving."""
     return {"status": "ok"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: model loaded + warmed and DB pool reachable."""
+    if not _readiness["db"]:
+        # Retry in case the DB was unavailable at startup
+        await _warm_up_db()
+    if get_model_status()["state"] == "failed":
+        _spawn(_warm_up_model())
+
+    ready = _readiness["db"] and is_model_ready()
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "model": get_model_status(),
+        "database": {"ready": _readiness["db"], "error": _readiness["db_error"]},
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get("/metrics/inference")
+async def inference_metrics():
+    """Inference executor queue depth / wait times and batching stats."""
+    return get_inference_stats()
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Per-deployment outbound LLM counters: throttles, retries, breaker trips."""
+    return governor_stats()
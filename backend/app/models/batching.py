@@ -0,0 +1,142 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item inference requests into batched
+    forward passes.
+
+    Callers `await submit(item)`; a background task collects items for at
+    most `max_wait_ms` (or until `max_batch_size` is reached), runs
+    `forward_fn(items)` once off the event loop and fans the per-item
+    results back to the awaiting coroutines.
+    """
+
+    def __init__(
+        self,
+        forward_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+
+        self.forward_fn = forward_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0.0) / 1000
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Counters
+        self.batches_run = 0
+        self.items_processed = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        self._ensure_started()
+
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def close(self):
+        """Stop the background worker (pending callers get cancelled)."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "average_batch_size": (
+                self.items_processed / self.batches_run if self.batches_run else 0.0
+            ),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+
+        # (Re)start lazily so the batcher binds to whichever loop serves requests
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued before waiting for stragglers
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+
+            # Skip callers that gave up while we were collecting
+            live = [(item, future) for item, future in batch if not future.done()]
+            if not live:
+                continue
+
+            items = [item for item, _ in live]
+
+            try:
+                results = await self._loop.run_in_executor(
+                    self.executor, self.forward_fn, items
+                )
+            except Exception as e:
+                for _, future in live:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.items_processed += len(live)
+
+            for (_, future), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,25 @@
+"""
+Convert best_dino_finetuned.pth into a file torch.load(mmap=True) can map
+directly (zipfile serialization, contiguous tensors, plain state dict).
+
+Usage (from backend/):
+    python -m app.models.convert_weights
+"""
+
+import torch
+
+from app.models.model import WEIGHTS_MMAP_PATH, WEIGHTS_PATH
+
+
+def convert(src: str = WEIGHTS_PATH, dst: str = WEIGHTS_MMAP_PATH):
+    state_dict = torch.load(src, map_location="cpu")
+    state_dict = {k: v.contiguous() for k, v in state_dict.items()}
+
+    torch.save(state_dict, dst, _use_new_zipfile_serialization=True)
+
+    total = sum(v.numel() * v.element_size() for v in state_dict.values())
+    print(f"✅ Wrote {len(state_dict)} tensors ({total / 1e6:.0f} MB) to {dst}")
+
+
+if __name__ == "__main__":
+    convert()
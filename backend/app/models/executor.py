@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class InferenceExecutor(Executor):
+    """
+    Dedicated thread pool for CPU-heavy inference work (image decoding,
+    transforms, model forward) so it never runs on the event loop.
+
+    Wraps a ThreadPoolExecutor and records queue depth and wait/run times.
+    Usable anywhere a concurrent.futures.Executor is accepted
+    (e.g. loop.run_in_executor).
+    """
+
+    def __init__(self, max_workers: int = 2, metrics_window: int = 512):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="skin-inference",
+        )
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_times: Deque[float] = deque(maxlen=metrics_window)
+        self._run_times: Deque[float] = deque(maxlen=metrics_window)
+
+    # ------------------------------------------------------------------
+    # Executor interface
+    # ------------------------------------------------------------------
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        enqueued_at = time.perf_counter()
+
+        with self._lock:
+            self._queued += 1
+
+        def task():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_times.append(started_at - enqueued_at)
+
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._failed += int(failed)
+                    self._run_times.append(time.perf_counter() - started_at)
+
+        future = self._pool.submit(task)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    # ------------------------------------------------------------------
+    # Async helpers
+    # ------------------------------------------------------------------
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool and await the result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, functools.partial(fn, *args, **kwargs))
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _on_done(self, future: Future):
+        # Cancelled before a worker picked it up -> never left the queue
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = list(self._wait_times)
+            runs = list(self._run_times)
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_ms_p50": _percentile(waits, 50) * 1000,
+                "wait_ms_p99": _percentile(waits, 99) * 1000,
+                "wait_ms_max": max(waits, default=0.0) * 1000,
+                "run_ms_p50": _percentile(runs, 50) * 1000,
+                "run_ms_p99": _percentile(runs, 99) * 1000,
+            }
@@ -0,0 +1,129 @@
+"""
+Export best_dino_finetuned.pth to ONNX (fp32 + int8 dynamically quantized)
+and check prediction parity against the PyTorch model.
+
+Usage (from backend/):
+    python -m app.models.export_onnx
+    python -m app.models.export_onnx --check-only
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from app.models.model import (
+    ONNX_INT8_PATH,
+    ONNX_PATH,
+    OnnxSkinClassifier,
+    load_model,
+)
+from app.models.transforms import TEST_TRANSFORM
+
+SAMPLE_IMAGES_DIR = "uploads/skin_images"
+
+
+class _WithFeatures(torch.nn.Module):
+    """Export both outputs so ONNX backends can persist embeddings too."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        return self.model.forward_with_features(x)
+
+
+def export_onnx(opset: int = 17):
+    model = load_model("torch").to("cpu")
+    dummy = torch.randn(1, 3, 518, 518)
+
+    torch.onnx.export(
+        _WithFeatures(model),
+        dummy,
+        ONNX_PATH,
+        input_names=["pixel_values"],
+        output_names=["logits", "features"],
+        dynamic_axes={
+            "pixel_values": {0: "batch", 2: "height", 3: "width"},
+            "logits": {0: "batch"},
+            "features": {0: "batch"},
+        },
+        opset_version=opset,
+        do_constant_folding=True,
+    )
+    print(f"✅ Exported fp32 ONNX model to {ONNX_PATH}")
+
+
+def quantize_int8():
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(ONNX_PATH, ONNX_INT8_PATH, weight_type=QuantType.QInt8)
+    print(f"✅ Wrote int8 dynamically-quantized model to {ONNX_INT8_PATH}")
+
+
+def check_parity(images_dir: str = SAMPLE_IMAGES_DIR) -> dict:
+    """
+    Compare ONNX backends against PyTorch on the sample uploads:
+    top-1 agreement, max absolute probability difference and mean latency.
+    """
+    paths = sorted(
+        p for p in glob.glob(os.path.join(images_dir, "*"))
+        if p.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    )
+    if not paths:
+        raise FileNotFoundError(f"No sample images found in {images_dir}")
+
+    tensors = [TEST_TRANSFORM(Image.open(p).convert("RGB")).unsqueeze(0) for p in paths]
+
+    backends = {"torch": load_model("torch").to("cpu")}
+    for name, path in (("onnx", ONNX_PATH), ("onnx-int8", ONNX_INT8_PATH)):
+        if os.path.exists(path):
+            backends[name] = OnnxSkinClassifier(path)
+
+    probs, latency = {}, {}
+    for name, model in backends.items():
+        outputs, start = [], time.perf_counter()
+        with torch.inference_mode():
+            for tensor in tensors:
+                outputs.append(F.softmax(model(tensor), dim=1)[0])
+        latency[name] = (time.perf_counter() - start) / len(tensors) * 1000
+        probs[name] = torch.stack(outputs)
+
+    reference = probs["torch"]
+    report = {}
+    for name, p in probs.items():
+        report[name] = {
+            "top1_agreement": (p.argmax(1) == reference.argmax(1)).float().mean().item(),
+            "max_abs_prob_diff": (p - reference).abs().max().item(),
+            "mean_latency_ms": latency[name],
+        }
+
+    print(f"Parity on {len(paths)} images from {images_dir}:")
+    print(f"{'backend':>10} {'top1 agree':>11} {'max |Δp|':>9} {'ms/img':>8}")
+    for name, r in report.items():
+        print(
+            f"{name:>10} {r['top1_agreement']:>11.2%} "
+            f"{r['max_abs_prob_diff']:>9.4f} {r['mean_latency_ms']:>8.1f}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--check-only", action="store_true")
+    parser.add_argument("--skip-int8", action="store_true")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--images-dir", default=SAMPLE_IMAGES_DIR)
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export_onnx(args.opset)
+        if not args.skip_int8:
+            quantize_int8()
+
+    check_parity(args.images_dir)
@@ -1,26 +1,265 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
 import torch
 import torch.nn.functional as F
 from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.batching import MicroBatcher
+from app.models.executor import InferenceExecutor
+from app.models.model import load_model, load_head, IDX2LABEL, MODEL_VERSION
+from app.models.prediction_cache import PredictionCache
+from app.models.transforms import get_transform, resolve_resolution
+
+# Forward passes are serialized by the batcher, so let each one use every core
+torch.set_num_threads(settings.INFERENCE_TORCH_THREADS or os.cpu_count() or 1)
+
+# Loaded lazily (see warm_up_model) so importing the app never blocks on
+# timm construction / torch.load
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+_WARM_UP_TASK: Optional[asyncio.Future] = None
+_WARM_UP_ERROR: Optional[str] = None
+
+_EXECUTOR = InferenceExecutor(max_workers=settings.INFERENCE_WORKERS)
+
+_CACHE = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    persistent=settings.PREDICTION_CACHE_PERSISTENT,
+    persistent_max_rows=settings.PREDICTION_CACHE_PERSISTENT_MAX_ROWS,
+    persistent_ttl_days=settings.PREDICTION_CACHE_PERSISTENT_TTL_DAYS,
+)
+
 
-from app.models.model import load_model, IDX2LABEL
-from app.models.transforms import TEST_TRANSFORM
+def _get_model():
+    global _MODEL
 
-_MODEL = load_model()
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                _MODEL = load_model(
+                    settings.INFERENCE_BACKEND,
+                    num_threads=settings.INFERENCE_TORCH_THREADS,
+                    weights_mode=settings.MODEL_WEIGHTS_MODE,
+                )
+    return _MODEL
 
 
-def run_skin_inference(image: Image.Image) -> dict:
-    model = _MODEL
-    device = next(model.parameters()).device  # safest way
+def _format_results(logits: torch.Tensor, features: Optional[torch.Tensor] = None) -> List[Dict]:
+    probs = F.softmax(logits.float(), dim=1)
+    conf, idx = probs.max(dim=1)
 
-    tensor = TEST_TRANSFORM(image).unsqueeze(0).to(device)
+    return [
+        {
+            "prediction": IDX2LABEL[i],
+            "confidence": c,
+            "probabilities": {
+                IDX2LABEL[k]: p for k, p in enumerate(probs[row].tolist())
+            },
+            # Backbone embedding (persisted per SkinImage, see embedding_store)
+            "embedding": (
+                features[row].float().cpu().numpy() if features is not None else None
+            ),
+        }
+        for row, (i, c) in enumerate(zip(idx.tolist(), conf.tolist()))
+    ]
+
+
+def _forward_batch(tensors: List[torch.Tensor]) -> List[Dict]:
+    """Run one forward pass over a list of preprocessed (C, H, W) tensors."""
+    model = _get_model()
+    # ONNX backends expose .device; nn.Module doesn't
+    device = getattr(model, "device", None) or next(model.parameters()).device
+
+    batch = torch.stack(tensors).to(device)
 
     with torch.inference_mode():
-        logits = model(tensor)
-        probs = F.softmax(logits, dim=1)[0]
-        conf, idx = probs.max(dim=0)
+        logits, features = model.forward_with_features(batch)
+
+    return _format_results(logits, features)
+
+
+def classify_embeddings(embeddings: np.ndarray) -> List[Dict]:
+    """
+    Head-only re-scoring of stored (N, 768) backbone embeddings with the
+    current head — no backbone pass. Results carry no "embedding".
+    """
+    head = load_head()
+    device = next(head.parameters()).device
+
+    with torch.inference_mode():
+        features = torch.as_tensor(np.asarray(embeddings, dtype=np.float32), device=device)
+        logits = head(features)
+
+    results = _format_results(logits)
+    for result in results:
+        del result["embedding"]
+    return results
+
+
+async def classify_embeddings_async(embeddings: np.ndarray) -> List[Dict]:
+    return await _EXECUTOR.run(classify_embeddings, embeddings)
+
+
+# One batcher per input resolution (tensors in a batch must share a shape)
+_BATCHERS: Dict[int, MicroBatcher] = {}
+
+_DEFAULT_RESOLUTION = resolve_resolution(settings.INFERENCE_RESOLUTION)
+
+
+def _get_batcher(resolution: int) -> MicroBatcher:
+    if resolution not in _BATCHERS:
+        _BATCHERS[resolution] = MicroBatcher(
+            _forward_batch,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            executor=_EXECUTOR,
+        )
+    return _BATCHERS[resolution]
+
+
+def _load_and_warm_up():
+    _get_model()
+    # First forward pays for allocator / kernel selection; do it before traffic
+    res = _DEFAULT_RESOLUTION
+    _forward_batch([torch.zeros(3, res, res)])
+
+
+async def warm_up_model():
+    """
+    Load the model and run a warm-up forward on the inference executor.
+    Idempotent: concurrent callers share one load; a failed load is retried
+    on the next call.
+    """
+    global _WARM_UP_TASK, _WARM_UP_ERROR
 
+    failed = _WARM_UP_TASK is not None and _WARM_UP_TASK.done() and (
+        _WARM_UP_TASK.cancelled() or _WARM_UP_TASK.exception() is not None
+    )
+    if _WARM_UP_TASK is None or failed:
+        _WARM_UP_TASK = asyncio.ensure_future(_EXECUTOR.run(_load_and_warm_up))
+
+    try:
+        await asyncio.shield(_WARM_UP_TASK)
+        _WARM_UP_ERROR = None
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        _WARM_UP_ERROR = repr(e)
+        raise
+
+
+def is_model_ready() -> bool:
+    return (
+        _WARM_UP_TASK is not None
+        and _WARM_UP_TASK.done()
+        and not _WARM_UP_TASK.cancelled()
+        and _WARM_UP_TASK.exception() is None
+    )
+
+
+def get_model_status() -> dict:
+    if is_model_ready():
+        state = "ready"
+    elif _WARM_UP_ERROR:
+        state = "failed"
+    elif _WARM_UP_TASK is not None:
+        state = "loading"
+    else:
+        state = "not_loaded"
+    return {"state": state, "error": _WARM_UP_ERROR}
+
+
+def _resolve(profile: Optional[Union[str, int]]) -> int:
+    return _DEFAULT_RESOLUTION if profile is None else resolve_resolution(profile)
+
+
+def _content_hash(image: Image.Image) -> str:
+    """Hash of the decoded pixels, so re-encoded / re-uploaded copies still match."""
+    digest = hashlib.sha256(f"{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _decode_image(img_bytes: bytes) -> Tuple[Image.Image, str]:
+    image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    return image, _content_hash(image)
+
+
+async def _predict(
+    image: Image.Image,
+    digest: str,
+    resolution: int,
+    db: Optional[AsyncSession],
+) -> dict:
+    key = PredictionCache.make_key(
+        digest, MODEL_VERSION, settings.INFERENCE_BACKEND, resolution
+    )
+
+    cached = await _CACHE.get(key, db)
+    if cached is not None:
+        cached["resolution"] = resolution
+        return cached
+
+    await warm_up_model()
+
+    tensor = await _EXECUTOR.run(get_transform(resolution), image)
+    result = await _get_batcher(resolution).submit(tensor)
+    result["resolution"] = resolution
+
+    await _CACHE.set(key, result, MODEL_VERSION, db)
+    return result
+
+
+def run_skin_inference(image: Image.Image, profile: Optional[Union[str, int]] = None) -> dict:
+    """Synchronous single-image inference (scripts / notebooks)."""
+    return _forward_batch([get_transform(_resolve(profile))(image)])[0]
+
+
+async def run_skin_inference_async(
+    image: Image.Image,
+    profile: Optional[Union[str, int]] = None,
+    db: Optional[AsyncSession] = None,
+) -> dict:
+    """
+    Request-path inference. Preprocessing runs on the inference executor and
+    concurrent callers are coalesced into one batched forward pass.
+    Identical images are served from the prediction cache (its Postgres tier
+    uses `db` when given, else a short-lived session of its own).
+
+    `profile` selects the input resolution ("fast", "accurate", 336, ...);
+    None uses the deployment default (INFERENCE_RESOLUTION).
+    Raises ValueError for an unknown profile.
+    """
+    resolution = _resolve(profile)
+    digest = await _EXECUTOR.run(_content_hash, image)
+    return await _predict(image, digest, resolution, db)
+
+
+async def run_skin_inference_bytes(
+    img_bytes: bytes,
+    profile: Optional[Union[str, int]] = None,
+    db: Optional[AsyncSession] = None,
+) -> dict:
+    """Same as run_skin_inference_async, but decodes the upload off the loop too."""
+    resolution = _resolve(profile)
+    image, digest = await _EXECUTOR.run(_decode_image, img_bytes)
+    return await _predict(image, digest, resolution, db)
+
+
+def get_inference_stats() -> dict:
     return {
-        "prediction": IDX2LABEL[idx.item()],
-        "confidence": conf.item()
+        "backend": settings.INFERENCE_BACKEND,
+        "model": get_model_status(),
+        "default_resolution": _DEFAULT_RESOLUTION,
+        "executor": _EXECUTOR.stats(),
+        "batchers": {str(res): b.stats() for res, b in _BATCHERS.items()},
+        "prediction_cache": _CACHE.stats(),
     }
-
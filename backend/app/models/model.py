@@ -3,6 +3,17 @@ import timm
 from torch import nn
 
 WEIGHTS_PATH = "app/models/best_dino_finetuned.pth"
+# Preconverted copy for mmap loading (see app/models/convert_weights.py)
+WEIGHTS_MMAP_PATH = "app/models/best_dino_finetuned.mmap.pt"
+ONNX_PATH = "app/models/best_dino_finetuned.onnx"
+ONNX_INT8_PATH = "app/models/best_dino_finetuned.int8.onnx"
+
+# Stored on SkinDiagnosis.model_version; bump when the weights change
+MODEL_VERSION = "v1"
+# Stored on SkinEmbedding.backbone_version; bump only when the backbone
+# changes (a new head alone can re-score stored embeddings)
+BACKBONE_VERSION = "v1"
+EMBEDDING_DIM = 768
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
@@ -13,47 +24,154 @@ IDX2LABEL = {
     3: "vitiligo"
 }
 
-_MODEL = None
+# torch: fp32 PyTorch | onnx: ONNX Runtime fp32 | onnx-int8: dynamically quantized
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# copy: private torch.load per process | mmap: tensors backed by the
+# page cache, shared across uvicorn workers
+WEIGHT_MODES = ("copy", "mmap")
+
+_MODELS = {}
+
+
+def build_head(in_features=EMBEDDING_DIM, num_classes=4) -> nn.Sequential:
+    return nn.Sequential(
+        nn.Linear(in_features, 512),        # head.0
+        nn.BatchNorm1d(512),                # head.1
+        nn.ReLU(inplace=True),              # head.2
+        nn.Dropout(0.3),                    # head.3
+        nn.Linear(512, 256),                # head.4
+        nn.ReLU(inplace=True),              # head.5
+        nn.Dropout(0.3),                    # head.6
+        nn.Linear(256, num_classes),        # head.7
+    )
 
 
 class SkinClassifier(nn.Module):
     def __init__(self, num_classes=4):
         super().__init__()
 
+        # dynamic_img_size: interpolate the 518px positional embeddings on the
+        # fly so lower-resolution profiles (224/336/448) run on the same weights
         self.backbone = timm.create_model(
             "vit_base_patch14_dinov2",
             pretrained=False,
-            num_classes=0
+            num_classes=0,
+            dynamic_img_size=True,
         )
 
         in_features = self.backbone.num_features  # 768 for vit_base
 
-        self.head = nn.Sequential(
-            nn.Linear(in_features, 512),        # head.0
-            nn.BatchNorm1d(512),                # head.1
-            nn.ReLU(inplace=True),              # head.2
-            nn.Dropout(0.3),                    # head.3
-            nn.Linear(512, 256),                # head.4
-            nn.ReLU(inplace=True),              # head.5
-            nn.Dropout(0.3),                    # head.6
-            nn.Linear(256, num_classes),        # head.7
-        )
+        self.head = build_head(in_features, num_classes)
 
     def forward(self, x):
         features = self.backbone(x)
         return self.head(features)
 
+    def forward_with_features(self, x):
+        """Logits plus the pooled backbone embedding (B, 768)."""
+        features = self.backbone(x)
+        return self.head(features), features
 
 
-def load_model():
-    global _MODEL
+class OnnxSkinClassifier:
+    """
+    ONNX Runtime stand-in for SkinClassifier on CPU.
+    Takes and returns torch tensors so the inference code is backend-agnostic.
+    """
+
+    device = torch.device("cpu")
+
+    def __init__(self, onnx_path: str, num_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError(
+                "onnxruntime is not installed; install it or use the 'torch' backend"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(
+            onnx_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return self.forward_with_features(x)[0]
 
-    if _MODEL is None:
+    def forward_with_features(self, x: torch.Tensor):
+        """Logits plus embedding; embedding is None for graphs exported without it."""
+        outputs = self.session.run(None, {self.input_name: x.cpu().numpy()})
+        features = torch.from_numpy(outputs[1]) if len(outputs) > 1 else None
+        return torch.from_numpy(outputs[0]), features
+
+
+def _load_torch_model(weights_mode: str) -> SkinClassifier:
+    if weights_mode == "mmap":
+        # Build on the meta device (no allocation), then point parameters at
+        # the memory-mapped tensors instead of copying them
+        state_dict = torch.load(
+            WEIGHTS_MMAP_PATH,
+            map_location="cpu",
+            mmap=True,
+            weights_only=True,
+        )
+        with torch.device("meta"):
+            model = SkinClassifier()
+        model.load_state_dict(state_dict, assign=True)
+
+        leftovers = [n for n, t in model.state_dict().items() if t.is_meta]
+        if leftovers:
+            raise RuntimeError(f"Weights missing from {WEIGHTS_MMAP_PATH}: {leftovers}")
+    else:
         model = SkinClassifier()
         state_dict = torch.load(WEIGHTS_PATH, map_location=DEVICE)
         model.load_state_dict(state_dict)
-        model.to(DEVICE)
-        model.eval()
-        _MODEL = model
 
-    return _MODEL
+    model.to(DEVICE)
+    model.eval()
+    return model
+
+
+def load_head() -> nn.Sequential:
+    """
+    Classification head only, for re-scoring stored embeddings without the
+    backbone (works regardless of the inference backend).
+    """
+    if "torch" in _MODELS:
+        return _MODELS["torch"].head
+    if "head" in _MODELS:
+        return _MODELS["head"]
+
+    state_dict = torch.load(WEIGHTS_PATH, map_location="cpu")
+    head = build_head()
+    head.load_state_dict({
+        k[len("head."):]: v for k, v in state_dict.items() if k.startswith("head.")
+    })
+    head.eval()
+    _MODELS["head"] = head
+    return head
+
+
+def load_model(backend: str = "torch", num_threads: int = 0, weights_mode: str = "copy"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    if weights_mode not in WEIGHT_MODES:
+        raise ValueError(f"Unknown weights mode '{weights_mode}', expected one of {WEIGHT_MODES}")
+
+    if backend not in _MODELS:
+        if backend == "torch":
+            model = _load_torch_model(weights_mode)
+        else:
+            onnx_path = ONNX_PATH if backend == "onnx" else ONNX_INT8_PATH
+            model = OnnxSkinClassifier(onnx_path, num_threads=num_threads)
+
+        _MODELS[backend] = model
+
+    return _MODELS[backend]
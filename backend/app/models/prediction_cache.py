@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.entities.prediction_cache import SkinPredictionCache
+from app.models.embeddings import decode_embedding, encode_embedding
+
+
+class PredictionCache:
+    """
+    Two-tier cache for skin predictions keyed by image content hash.
+
+    - Tier 1: in-process LRU bounded by `max_entries`
+    - Tier 2 (optional): the `skin_prediction_cache` Postgres table, used
+      when `persistent=True` (through the caller's session if given, else a
+      short-lived one). Rows expire after `persistent_ttl_days`; every
+      `trim_every` writes, expired rows and the oldest rows beyond
+      `persistent_max_rows` are deleted
+
+    Persistent-tier failures are logged and treated as misses so the cache
+    can never fail an inference request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        persistent: bool = False,
+        persistent_max_rows: int = 100_000,
+        persistent_ttl_days: float = 30,
+        trim_every: int = 500,
+    ):
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.persistent_max_rows = persistent_max_rows
+        self.persistent_ttl = timedelta(days=persistent_ttl_days)
+        self.trim_every = trim_every
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._writes_since_trim = 0
+
+        # Counters
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persistent_evictions = 0
+
+    @staticmethod
+    def make_key(digest: str, model_version: str, backend: str, resolution: int) -> str:
+        return f"{model_version}:{backend}:{resolution}:{digest}"
+
+    async def get(self, key: str, db: Optional[AsyncSession] = None) -> Optional[Dict]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return dict(self._entries[key])
+
+        if self.persistent:
+            try:
+                async with self._session(db) as session:
+                    result = await session.execute(
+                        select(SkinPredictionCache).where(
+                            SkinPredictionCache.cache_key == key,
+                            SkinPredictionCache.created_at > self._cutoff(),
+                        )
+                    )
+                    row = result.scalar_one_or_none()
+            except Exception as e:
+                print(f"Prediction cache lookup failed: {e}")
+                row = None
+
+            # Rows written before probabilities were stored are misses (and
+            # get rewritten), so both tiers return the same shape
+            if row and row.probabilities is not None:
+                self.persistent_hits += 1
+                value = {
+                    "prediction": row.prediction,
+                    "confidence": row.confidence,
+                    "probabilities": row.probabilities,
+                    "embedding": decode_embedding(row.embedding),
+                }
+                self._remember(key, value)
+                return dict(value)
+
+        self.misses += 1
+        return None
+
+    async def set(
+        self,
+        key: str,
+        value: Dict,
+        model_version: str,
+        db: Optional[AsyncSession] = None,
+    ):
+        self._remember(key, value)
+
+        if not self.persistent:
+            return
+
+        try:
+            async with self._session(db) as session:
+                # Savepoint so a cache write can't poison the caller's transaction
+                async with session.begin_nested():
+                    values = dict(
+                        cache_key=key,
+                        model_version=model_version,
+                        prediction=value["prediction"],
+                        confidence=value["confidence"],
+                        probabilities=value.get("probabilities"),
+                        embedding=(
+                            encode_embedding(value["embedding"])
+                            if value.get("embedding") is not None else None
+                        ),
+                    )
+                    await session.execute(
+                        insert(SkinPredictionCache)
+                        .values(**values)
+                        .on_conflict_do_update(
+                            index_elements=["cache_key"],
+                            set_={
+                                "probabilities": values["probabilities"],
+                                "embedding": values["embedding"],
+                            },
+                        )
+                    )
+                if db is None:
+                    await session.commit()
+        except Exception as e:
+            print(f"Prediction cache write failed: {e}")
+            return
+
+        self._writes_since_trim += 1
+        if self._writes_since_trim >= self.trim_every:
+            self._writes_since_trim = 0
+            await self.trim()
+
+    async def trim(self) -> int:
+        """Delete expired rows and the oldest rows beyond `persistent_max_rows`."""
+        try:
+            async with AsyncSessionLocal() as session:
+                overflow = (
+                    select(SkinPredictionCache.cache_key)
+                    .order_by(SkinPredictionCache.created_at.desc())
+                    .offset(self.persistent_max_rows)
+                )
+                result = await session.execute(
+                    delete(SkinPredictionCache).where(
+                        or_(
+                            SkinPredictionCache.created_at <= self._cutoff(),
+                            SkinPredictionCache.cache_key.in_(overflow),
+                        )
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"Prediction cache trim failed: {e}")
+            return 0
+
+        self.persistent_evictions += result.rowcount or 0
+        return result.rowcount or 0
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - self.persistent_ttl
+
+    @staticmethod
+    @asynccontextmanager
+    async def _session(db: Optional[AsyncSession]):
+        if db is not None:
+            yield db
+        else:
+            async with AsyncSessionLocal() as session:
+                yield session
+
+    def _remember(self, key: str, value: Dict):
+        self._entries[key] = dict(value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self.persistent,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "persistent_evictions": self.persistent_evictions,
+            "hit_rate": (
+                (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0
+            ),
+        }
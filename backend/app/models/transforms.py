@@ -1,12 +1,59 @@
+from functools import lru_cache
+from typing import Optional, Union
+
 from torchvision import transforms
 
 # ImageNet normalization (used by ViT / DINO models)
 IMAGENET_MEAN = [0.485, 0.456, 0.406]
 IMAGENET_STD = [0.229, 0.224, 0.225]
 
-TEST_TRANSFORM = transforms.Compose([
-    transforms.Resize((518, 518)),   
-    transforms.ToTensor(),
-    transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD),
-])
+# ViT-B/14: resolutions must be a multiple of the patch size
+PATCH_SIZE = 14
+
+# Input resolution profiles (patch tokens = (res / 14) ** 2)
+RESOLUTION_PROFILES = {
+    "fast": 224,       # 256 tokens  - free-tier triage
+    "balanced": 336,   # 576 tokens
+    "detailed": 448,   # 1024 tokens
+    "accurate": 518,   # 1369 tokens - training resolution
+}
+DEFAULT_RESOLUTION = RESOLUTION_PROFILES["accurate"]
+
+
+def resolve_resolution(profile: Optional[Union[str, int]]) -> int:
+    """Map a profile name ("fast") or its pixel size ("336") to a resolution."""
+    if profile is None or profile == "":
+        return DEFAULT_RESOLUTION
+
+    if isinstance(profile, str) and profile in RESOLUTION_PROFILES:
+        return RESOLUTION_PROFILES[profile]
+
+    try:
+        resolution = int(profile)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Unknown resolution profile '{profile}', expected one of "
+            f"{list(RESOLUTION_PROFILES)} or a pixel size"
+        )
+
+    # Only profile sizes: each resolution gets its own cached transform and
+    # micro-batcher, and large inputs cost quadratically more tokens
+    if resolution not in RESOLUTION_PROFILES.values():
+        raise ValueError(
+            f"Unsupported resolution {resolution}, expected one of "
+            f"{sorted(RESOLUTION_PROFILES.values())}"
+        )
+
+    return resolution
+
+
+@lru_cache(maxsize=None)
+def get_transform(resolution: int = DEFAULT_RESOLUTION) -> transforms.Compose:
+    return transforms.Compose([
+        transforms.Resize((resolution, resolution)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD),
+    ])
+
 
+TEST_TRANSFORM = get_transform(DEFAULT_RESOLUTION)
@@ -1,23 +1,39 @@
 # reports.py
 # FINAL FIXED VERSION – CACHE + METRICS SAFE (PYTHON 3.9)
 
-from fastapi import APIRouter, Depends, HTTPException, Header
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from datetime import date, timedelta
+from sqlalchemy import select, and_, desc, func, not_, or_, update
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import defer
+from datetime import date, datetime, timedelta
 from uuid import UUID
 from typing import Optional   # ✅ REQUIRED FOR PYTHON 3.9
+import asyncio
+import json
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
 from app.entities.user import User
 from app.entities.weekly_report import WeeklyReport
 from app.schemas.reports import WeeklyMetrics
-from app.schemas.reports_api import WeeklyReportAPIResponse
+from app.schemas.reports_api import WeeklyReportAPIResponse, WeeklyReportRangeResponse
 from app.services.report_generator import ReportGenerator
+from app.services.report_pdf import PdfUnavailableError, ReportPdfService
+from app.services.report_renderer import ReportRenderer
+from app.services.storage import StorageService
+from app.utils.concurrency import bounded_gather
+from app.utils.llm_governor import CircuitOpenError
+from app.utils.singleflight import SingleFlight, StreamFlight, advisory_xact_lock, try_advisory_session_lock
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 report_generator = ReportGenerator()
+report_renderer = ReportRenderer(assets_base_url=settings.REPORT_ASSETS_BASE_URL)
+report_pdf_service = ReportPdfService(
+    StorageService(settings.REPORT_PDF_DIR),
+    workers=settings.REPORT_PDF_WORKERS,
+)
 
 
 # ============================================================================
@@ -65,89 +81,334 @@ def normalize_metrics(raw_metrics: dict, *, days_tracked: int, consistent_tracki
     return WeeklyMetrics(**normalized).model_dump()
 
 
+def _current_metrics(raw_metrics: Optional[dict]) -> dict:
+    """Stored metrics in the current shape (legacy rows are converted in memory)."""
+    raw_metrics = raw_metrics or {}
+    return normalize_metrics(
+        raw_metrics,
+        days_tracked=raw_metrics.get("days_tracked", 0),
+        consistent_tracking=raw_metrics.get("consistent_tracking", False),
+    )
+
+
+BACKFILL_LOCK = "report-metrics-backfill"
+
+
+def _legacy_metrics_filter():
+    """Rows whose stored metrics aren't in the current WeeklyMetrics shape."""
+    current_keys = array(list(WeeklyMetrics.model_fields))
+    return or_(
+        WeeklyReport.metrics.is_(None),
+        not_(WeeklyReport.metrics.has_all(current_keys)),
+        WeeklyReport.metrics.has_any(array(["improvement_percentage", "total_images"])),
+    )
+
+
+async def backfill_report_metrics(batch_size: int = 200) -> int:
+    """
+    Rewrite legacy metric shapes in weekly_reports once, so reads never
+    have to. Runs in the background at startup; returns rows updated.
+
+    Only one worker runs it (the others skip it), and it only reads
+    legacy-shaped rows, so once they are converted it is a single empty
+    query per boot.
+    """
+    updated = 0
+    last_id = None
+
+    async with try_advisory_session_lock(BACKFILL_LOCK) as acquired:
+        if not acquired:
+            return 0
+
+        async with AsyncSessionLocal() as db:
+            while True:
+                query = (
+                    select(WeeklyReport.id, WeeklyReport.metrics)
+                    .where(_legacy_metrics_filter())
+                    .order_by(WeeklyReport.id)
+                    .limit(batch_size)
+                )
+                if last_id is not None:
+                    query = query.where(WeeklyReport.id > last_id)
+                rows = (await db.execute(query)).all()
+                if not rows:
+                    break
+
+                for report_id, raw_metrics in rows:
+                    try:
+                        metrics = _current_metrics(raw_metrics)
+                    except Exception as e:
+                        print(f"Skipping metrics backfill for report {report_id}: {e}")
+                        continue
+                    if metrics != raw_metrics:
+                        await db.execute(
+                            update(WeeklyReport)
+                            .where(WeeklyReport.id == report_id)
+                            .values(metrics=metrics)
+                        )
+                        updated += 1
+
+                await db.commit()
+                last_id = rows[-1][0]
+
+    return updated
+
+
+# ============================================================================
+# 🏷️ ETAG
+# ============================================================================
+
+def report_etag(report: WeeklyReport) -> str:
+    # created_at is reset whenever the report is regenerated
+    return f'"{report.id}-{int(report.created_at.timestamp() * 1000)}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.replace("W/", "", 1) == etag for tag in candidates)
+
+
+def _cache_headers(report: WeeklyReport) -> dict:
+    # Clients may keep the report but must revalidate (cheap 304) before use
+    return {"ETag": report_etag(report), "Cache-Control": "private, no-cache"}
+
+
 # ============================================================================
 # INTERNAL HELPER
 # ============================================================================
 
-async def _get_or_generate_report(
-    user: User,
+report_flight = SingleFlight()
+
+
+async def _find_report(db: AsyncSession, user_id: UUID, week_start: date) -> Optional[WeeklyReport]:
+    # Newest first: tolerates duplicate rows created before the unique index
+    result = await db.execute(
+        select(WeeklyReport)
+        .where(
+            and_(
+                WeeklyReport.user_id == user_id,
+                WeeklyReport.week_start == week_start
+            )
+        )
+        .order_by(desc(WeeklyReport.created_at))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def _generate_report(
+    user_id: UUID,
     week_start: date,
     force_regenerate: bool,
-    db: AsyncSession
+    lock_name: str,
+    context: Optional[dict] = None,
 ):
+    """
+    Generate and store the report for one (user, week) in its own sessions.
+    `context` skips gather_weekly_context when the caller already built it.
+    Returns (report_id, created).
+
+    The advisory lock only covers the short check and store transactions,
+    never the LLM call, so neither this generation nor workers waiting on
+    the lock hold a pooled connection while the model runs.
+    """
     week_end = week_start + timedelta(days=6)
 
-    # Cached report (auto-migrate metrics)
-    if not force_regenerate:
-        result = await db.execute(
-            select(WeeklyReport).where(
-                and_(
-                    WeeklyReport.user_id == user.id,
-                    WeeklyReport.week_start == week_start
-                )
-            )
-        )
-        existing = result.scalar_one_or_none()
+    async with AsyncSessionLocal() as db:
+        await advisory_xact_lock(db, lock_name)
 
-        if existing and existing.report_html:
-            raw_metrics = existing.metrics or {}
+        existing = await _find_report(db, user_id, week_start)
+        if existing and existing.condition_summary and not force_regenerate:
+            # Another worker generated it before we got the lock
+            return existing.id, False
+        seen_version = existing.created_at if existing else None
+        await db.commit()  # Releases the lock
 
-            existing.metrics = normalize_metrics(
-                raw_metrics,
-                days_tracked=raw_metrics.get("days_tracked", 0),
-                consistent_tracking=raw_metrics.get("consistent_tracking", False),
+        if context is None:
+            context = await report_generator.gather_weekly_context(
+                db, user_id, week_start, week_end
             )
 
-            await db.commit()
-            await db.refresh(existing)
-            return existing, False
+    if not context:
+        raise HTTPException(404, "No data found for this week")
 
-    # Generate new report
-    if not report_generator.is_available():
-        raise HTTPException(503, "Report generation unavailable")
+    try:
+        report_data = await report_generator.generate_report_with_llm(context, user_id)
+    except CircuitOpenError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": str(int(e.retry_in) + 1)})
 
-    context = await report_generator.gather_weekly_context(
-        db, user.id, week_start, week_end
-    )
+    async with AsyncSessionLocal() as db:
+        weekly_report, created = await _store_generated(
+            db, user_id, week_start, context, report_data, seen_version
+        )
+        await db.commit()
+        return weekly_report.id, created
 
-    if not context:
-        raise HTTPException(404, "No data found for this week")
 
-    unique_dates = set()
-    for diag in context.get("diagnoses", []):
-        from datetime import datetime
-        unique_dates.add(datetime.fromisoformat(diag["date"]).date())
+async def _store_generated(
+    db: AsyncSession,
+    user_id: UUID,
+    week_start: date,
+    context: dict,
+    report_data: dict,
+    seen_version: Optional[datetime],
+):
+    """
+    Store a generated report under the (user, week) advisory lock. If
+    another worker stored one since we checked (`seen_version` is the
+    created_at we saw then), theirs is kept. Returns (report, created);
+    caller commits.
+    """
+    await advisory_xact_lock(db, _report_lock_name(user_id, week_start))
+
+    existing = await _find_report(db, user_id, week_start)
+    if existing and existing.condition_summary and existing.created_at != seen_version:
+        return existing, False
 
-    days_tracked = len(unique_dates)
-    consistent_tracking = days_tracked >= 3
+    return _store_report(db, existing, user_id, week_start, context, report_data), True
 
-    report_data = await report_generator.generate_report_with_llm(context, user.id)
 
+def _store_report(
+    db: AsyncSession,
+    existing: Optional[WeeklyReport],
+    user_id: UUID,
+    week_start: date,
+    context: dict,
+    report_data: dict,
+) -> WeeklyReport:
+    """Build the WeeklyReport row from LLM output (caller commits)."""
+    unique_dates = {
+        datetime.fromisoformat(diag["date"]).date()
+        for diag in context.get("diagnoses", [])
+    }
+    days_tracked = len(unique_dates)
+
+    # Measured numbers come from the context; the LLM doesn't return metrics
+    current_week = context["current_week"]
     metrics = normalize_metrics(
-        report_data.get("metrics", {}),
+        {
+            "average_severity": current_week.get("average_severity_score"),
+            "average_confidence": current_week.get("average_confidence", 0.0),
+            "improvement_vs_last_week": current_week.get("improvement_percentage"),
+            "total_images_uploaded": context["total_images"],
+            **report_data.get("metrics", {}),
+        },
         days_tracked=days_tracked,
-        consistent_tracking=consistent_tracking,
+        consistent_tracking=days_tracked >= 3,
     )
 
-    report_html = report_generator.generate_html_report(report_data, context)
-
-    weekly_report = WeeklyReport(
-        user_id=user.id,
-        week_start=week_start,
-        week_end=week_end,
+    fields = dict(
+        week_end=week_start + timedelta(days=6),
+        report_title=report_data.get("report_title"),
         condition_summary=report_data["condition_summary"],
-        skin_trend=report_data["skin_trend"],
+        # The prompt doesn't ask for a trend; fall back to the tracked one
+        skin_trend=(
+            report_data.get("skin_trend")
+            or context["current_week"].get("severity_trend")
+            or "unknown"
+        ),
         metrics=metrics,
         key_insights=report_data["key_insights"],
         recommendations=report_data["recommendations"],
-        report_html=report_html,
+        metrics_interpretation=report_data.get("metrics_interpretation"),
+        next_steps=report_data.get("next_steps"),
+        report_text=report_data["condition_summary"],
+    )
+
+    # Regenerating overwrites the week's row instead of adding another
+    if existing:
+        for name, value in fields.items():
+            setattr(existing, name, value)
+        existing.created_at = func.now()
+        weekly_report = existing
+    else:
+        weekly_report = WeeklyReport(user_id=user_id, week_start=week_start, **fields)
+        db.add(weekly_report)
+
+    # By default the HTML is rendered on demand from the fields above
+    weekly_report.report_html = (
+        report_renderer.render_report(weekly_report) if settings.REPORT_STORE_HTML else None
+    )
+    return weekly_report
+
+
+async def _find_cached_report(
+    db: AsyncSession,
+    user_id: UUID,
+    week_start: date,
+    load_html: bool,
+) -> Optional[WeeklyReport]:
+    """Read-only lookup of a finished report: one SELECT on the (user, week) index."""
+    query = (
+        select(WeeklyReport)
+        .where(
+            and_(
+                WeeklyReport.user_id == user_id,
+                WeeklyReport.week_start == week_start,
+                WeeklyReport.condition_summary.isnot(None),
+            )
+        )
+        .order_by(desc(WeeklyReport.created_at))
+        .limit(1)
+    )
+    if not load_html:
+        query = query.options(defer(WeeklyReport.report_html))
+
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def _get_or_generate_report(
+    user: User,
+    week_start: date,
+    force_regenerate: bool,
+    db: AsyncSession,
+    load_html: bool = True,
+):
+    # Cached report: no writes on the read path (metrics shape is fixed up
+    # in memory by _current_metrics and on disk by backfill_report_metrics)
+    if not force_regenerate:
+        existing = await _find_cached_report(db, user.id, week_start, load_html)
+        if existing:
+            return existing, False
+
+    # Generate new report
+    if not report_generator.is_available():
+        raise HTTPException(503, "Report generation unavailable")
+
+    report_id, created = await _generate_once(user.id, week_start, force_regenerate)
+
+    weekly_report = await db.get(WeeklyReport, report_id, populate_existing=True)
+    return weekly_report, created
+
+
+def _report_lock_name(user_id: UUID, week_start: date) -> str:
+    return f"weekly-report:{user_id}:{week_start}"
+
+
+async def _generate_once(
+    user_id: UUID,
+    week_start: date,
+    force_regenerate: bool,
+    context: Optional[dict] = None,
+):
+    # /weekly and /weekly/html usually arrive together: one generation per
+    # (user, week) in this process, the advisory lock covers other workers.
+    # A forced regeneration never joins a normal one (that would just hand
+    # back the report being generated)
+    lock_name = _report_lock_name(user_id, week_start)
+    return await report_flight.do(
+        (lock_name, force_regenerate),
+        lambda: _generate_report(user_id, week_start, force_regenerate, lock_name, context),
     )
 
-    db.add(weekly_report)
-    await db.commit()
-    await db.refresh(weekly_report)
 
-    return weekly_report, True
+async def pregenerate_report(user_id: UUID, week_start: date) -> bool:
+    """Scheduler entry point: store the (user, week) report unless it exists."""
+    _, created = await _generate_once(user_id, week_start, False)
+    return created
 
 
 # ============================================================================
@@ -156,8 +417,10 @@ async def _get_or_generate_report(
 
 @router.get("/weekly", response_model=WeeklyReportAPIResponse)
 async def get_report_json(
+    response: Response,
     week_start: Optional[date] = None,   # ✅ FIXED
     force_regenerate: bool = False,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -166,17 +429,26 @@ async def get_report_json(
         week_start = today - timedelta(days=today.weekday())
 
     weekly_report, _ = await _get_or_generate_report(
-        user, week_start, force_regenerate, db
+        user, week_start, force_regenerate, db, load_html=False
     )
 
+    headers = _cache_headers(weekly_report)
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    return _to_api_response(weekly_report)
+
+
+def _to_api_response(weekly_report: WeeklyReport) -> WeeklyReportAPIResponse:
     return WeeklyReportAPIResponse(
         report_id=weekly_report.id,
-        user_id=user.id,
+        user_id=weekly_report.user_id,
         week_start=weekly_report.week_start,
         week_end=weekly_report.week_end,
         condition_summary=weekly_report.condition_summary,
         skin_trend=weekly_report.skin_trend,
-        metrics=weekly_report.metrics,
+        metrics=_current_metrics(weekly_report.metrics),
         key_insights=weekly_report.key_insights,
         recommendations=weekly_report.recommendations,
         generated_at=weekly_report.created_at,
@@ -191,6 +463,7 @@ async def get_report_json(
 async def get_report_html(
     week_start: Optional[date] = None,   # ✅ FIXED
     force_regenerate: bool = False,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -202,4 +475,284 @@ async def get_report_html(
         user, week_start, force_regenerate, db
     )
 
-    return HTMLResponse(content=weekly_report.report_html)
+    headers = _cache_headers(weekly_report)
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # Reports stored with HTML (REPORT_STORE_HTML / older rows) skip rendering
+    html = weekly_report.report_html or report_renderer.render_report(weekly_report)
+    return HTMLResponse(content=html, headers=headers)
+
+
+# ============================================================================
+# ENDPOINT 3: WEEKLY REPORT (SERVER-SENT EVENTS)
+# ============================================================================
+
+# One streamed generation per (user, week, force) in this process: later
+# streamers replay its events so far and follow the rest. Producers outlive
+# disconnected clients (the report is still stored)
+report_stream_flight = StreamFlight()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _stored_sections(report: WeeklyReport):
+    yield "report_title", report.report_title
+    yield "condition_summary", report.condition_summary
+    yield "skin_trend", report.skin_trend
+    yield "key_insights", report.key_insights
+    yield "recommendations", report.recommendations
+    yield "metrics_interpretation", report.metrics_interpretation
+    yield "next_steps", report.next_steps
+
+
+def _done_event(report: WeeklyReport, generated: bool) -> str:
+    return _sse("done", {
+        "report_id": report.id,
+        "generated": generated,
+        "generated_at": report.created_at,
+        "metrics": _current_metrics(report.metrics),
+    })
+
+
+async def _stream_report(emit, user_id: UUID, week_start: date, force_regenerate: bool):
+    """Generate the report, emitting each finished section as SSE."""
+    lock_name = _report_lock_name(user_id, week_start)
+    try:
+        generation = report_flight.running((lock_name, force_regenerate))
+        if generation is not None:
+            # A /weekly or /weekly/html request is already generating it:
+            # wait for that one and replay the stored row
+            report_id, created = await asyncio.shield(generation)
+            async with AsyncSessionLocal() as db:
+                report = await db.get(WeeklyReport, report_id)
+            for key, value in _stored_sections(report):
+                emit(_sse("section", {"key": key, "value": value}))
+            emit(_done_event(report, created))
+            return
+
+        # Same lock and phases as _generate_report: the lock (and a pooled
+        # connection) is never held while the LLM streams
+        async with AsyncSessionLocal() as db:
+            await advisory_xact_lock(db, lock_name)
+
+            existing = await _find_report(db, user_id, week_start)
+            if existing and existing.condition_summary and not force_regenerate:
+                for key, value in _stored_sections(existing):
+                    emit(_sse("section", {"key": key, "value": value}))
+                emit(_done_event(existing, False))
+                return
+            seen_version = existing.created_at if existing else None
+            await db.commit()  # Releases the lock
+
+            context = await report_generator.gather_weekly_context(
+                db, user_id, week_start, week_start + timedelta(days=6)
+            )
+
+        if not context:
+            emit(_sse("error", {"status": 404, "detail": "No data found for this week"}))
+            return
+
+        report_data = {}
+        async for key, value in report_generator.stream_report_with_llm(context, user_id):
+            report_data[key] = value
+            emit(_sse("section", {"key": key, "value": value}))
+
+        async with AsyncSessionLocal() as db:
+            weekly_report, created = await _store_generated(
+                db, user_id, week_start, context, report_data, seen_version
+            )
+            await db.commit()
+            await db.refresh(weekly_report)
+        emit(_done_event(weekly_report, created))
+
+    except HTTPException as e:
+        emit(_sse("error", {"status": e.status_code, "detail": e.detail}))
+    except CircuitOpenError as e:
+        emit(_sse("error", {"status": 503, "detail": str(e), "retry_in": e.retry_in}))
+    except Exception as e:
+        print(f"Streaming report generation failed: {e}")
+        emit(_sse("error", {"status": 500, "detail": f"Report generation failed: {e}"}))
+
+
+@router.get("/weekly/stream")
+async def stream_report(
+    week_start: Optional[date] = None,
+    force_regenerate: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Weekly report as Server-Sent Events. Sections are pushed as soon as the
+    LLM has finished them, then a final `done` event once it is stored:
+
+        event: section
+        data: {"key": "condition_summary", "value": "..."}
+
+        event: done
+        data: {"report_id": "...", "generated": true, "generated_at": "...", "metrics": {...}}
+
+    Failures arrive as `event: error` with {"status", "detail"}. A stored
+    report is replayed the same way without calling the LLM, as is one a
+    concurrent /weekly request is generating. Concurrent streams for the
+    same week share one LLM stream.
+    """
+    if not week_start:
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if not force_regenerate:
+        existing = await _find_cached_report(db, user.id, week_start, load_html=False)
+        if existing:
+            async def replay():
+                for key, value in _stored_sections(existing):
+                    yield _sse("section", {"key": key, "value": value})
+                yield _done_event(existing, False)
+
+            return StreamingResponse(replay(), media_type="text/event-stream", headers=headers)
+
+    if not report_generator.is_available():
+        raise HTTPException(503, "Report generation unavailable")
+
+    events = report_stream_flight.subscribe(
+        (_report_lock_name(user.id, week_start), force_regenerate),
+        lambda emit: _stream_report(emit, user.id, week_start, force_regenerate),
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+
+# ============================================================================
+# ENDPOINT 4: WEEKLY REPORT (PDF)
+# ============================================================================
+
+@router.get("/weekly/pdf")
+async def get_report_pdf(
+    week_start: Optional[date] = None,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Weekly report as a downloadable PDF (e.g. to send to a dermatologist).
+    Rendered once per report version in a worker process, then served
+    from storage.
+    """
+    if not week_start:
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+
+    weekly_report, _ = await _get_or_generate_report(
+        user, week_start, False, db, load_html=False
+    )
+
+    headers = _cache_headers(weekly_report)
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await report_pdf_service.get_or_render(db, weekly_report)
+    except PdfUnavailableError as e:
+        raise HTTPException(503, str(e))
+    except Exception as e:
+        print(f"PDF export failed for report {weekly_report.id}: {e}")
+        raise HTTPException(500, "PDF rendering failed")
+
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"skin-report-{weekly_report.week_start.isoformat()}.pdf",
+        headers=headers,
+    )
+
+
+# ============================================================================
+# ENDPOINT 5: REPORT RANGE (e.g. quarterly review)
+# ============================================================================
+
+@router.get("/range", response_model=WeeklyReportRangeResponse)
+async def get_report_range(
+    start: date,
+    weeks: int = 12,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Weekly reports for `weeks` consecutive weeks from the week containing
+    `start`. Stored reports are reused; missing weeks are generated
+    concurrently (REPORT_RANGE_CONCURRENCY at a time) from contexts built
+    by a single pass over one range query; a generation only holds a DB
+    connection briefly before and after its LLM call. Weeks without data
+    are listed in `no_data_weeks`, weeks that failed to generate in
+    `failed_weeks`.
+    """
+    if not 1 <= weeks <= settings.REPORT_RANGE_MAX_WEEKS:
+        raise HTTPException(400, f"weeks must be between 1 and {settings.REPORT_RANGE_MAX_WEEKS}")
+
+    first_week = start - timedelta(days=start.weekday())
+    week_starts = [first_week + timedelta(weeks=i) for i in range(weeks)]
+
+    result = await db.execute(
+        select(WeeklyReport)
+        .options(defer(WeeklyReport.report_html))
+        .where(
+            and_(
+                WeeklyReport.user_id == user.id,
+                WeeklyReport.week_start.between(week_starts[0], week_starts[-1]),
+                WeeklyReport.condition_summary.isnot(None),
+            )
+        )
+    )
+    reports = {r.week_start: r for r in result.scalars().all()}
+
+    no_data_weeks, failed_weeks = [], []
+    missing = [w for w in week_starts if w not in reports]
+
+    if missing:
+        contexts = await report_generator.gather_range_contexts(db, user.id, first_week, weeks)
+        no_data_weeks = [w for w in missing if w not in contexts]
+        to_generate = [w for w in missing if w in contexts]
+
+        if to_generate and not report_generator.is_available():
+            failed_weeks = [
+                {"week_start": w, "error": "Report generation unavailable"} for w in to_generate
+            ]
+        elif to_generate:
+            # End the read transaction so this request's pooled connection
+            # isn't held while the generations (each using short sessions
+            # of its own, none across the LLM call) run
+            await db.commit()
+            outcomes = await bounded_gather(
+                [
+                    lambda w=w: _generate_once(user.id, w, False, contexts[w])
+                    for w in to_generate
+                ],
+                settings.REPORT_RANGE_CONCURRENCY,
+            )
+
+            generated_ids = []
+            for week_start, outcome in zip(to_generate, outcomes):
+                if outcome["error"]:
+                    failed_weeks.append({"week_start": week_start, "error": outcome["error"]})
+                else:
+                    generated_ids.append(outcome["result"][0])
+
+            if generated_ids:
+                result = await db.execute(
+                    select(WeeklyReport)
+                    .options(defer(WeeklyReport.report_html))
+                    .where(WeeklyReport.id.in_(generated_ids))
+                )
+                reports.update({r.week_start: r for r in result.scalars().all()})
+
+    return WeeklyReportRangeResponse(
+        user_id=user.id,
+        start=week_starts[0],
+        end=week_starts[-1] + timedelta(days=6),
+        reports=[_to_api_response(reports[w]) for w in week_starts if w in reports],
+        no_data_weeks=no_data_weeks,
+        failed_weeks=failed_weeks,
+    )
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, delete
 from datetime import datetime, timedelta
 from pydantic import BaseModel  
 from uuid import UUID
-from PIL import Image
-import io, os
+from typing import Optional, List
+import json, os
+import numpy as np
 import uuid as uuid_lib
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.entities.skin_image import SkinImage
 from app.entities.skin_diagnosis import SkinDiagnosis
@@ -23,14 +26,25 @@ from app.schemas.skin import (
 
 from app.services.storage import StorageService
 from app.services.azure_vision import AzureVisionService
-from app.models.inference import run_skin_inference
+from app.models.inference import run_skin_inference_bytes, classify_embeddings_async
+from app.models.embeddings import cosine_similarity
+from app.models.model import MODEL_VERSION
+from app.models.transforms import resolve_resolution
 from app.services.improvement_analyzer import ImprovementAnalyzer
+from app.services.embedding_store import EmbeddingStore
+from app.services.progress_comparison import LocalComparisonEngine
+from app.services.vision_jobs import VisionAnalysisJobs
+from app.utils.concurrency import bounded_as_completed, bounded_gather
+from app.utils.llm_governor import CircuitOpenError
 
 
 router = APIRouter(prefix="/skin", tags=["Skin Analysis"])
 storage = StorageService()
 vision_service = AzureVisionService()
 improvement_analyzer = ImprovementAnalyzer()
+embedding_store = EmbeddingStore()
+comparison_engine = LocalComparisonEngine()
+vision_jobs = VisionAnalysisJobs(vision_service)
 
 
 class ImageCompareRequest(BaseModel):
@@ -76,14 +90,25 @@ def url_to_filesystem_path(url_path: str) -> str:
 # ============================================================================
 
 @router.post("/infer")
-async def diagnose_skin(file: UploadFile = File(...)):
+async def diagnose_skin(
+    file: UploadFile = File(...),
+    mode: Optional[str] = None,
+):
+    """
+    `mode` selects the input resolution profile: "fast" (224px triage),
+    "balanced", "detailed" or "accurate" (518px). Defaults to the
+    deployment's INFERENCE_RESOLUTION.
+    """
     if not file.content_type.startswith("image/"):
         raise HTTPException(400, "Invalid image file")
 
     img_bytes = await file.read()
-    pil_img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
 
-    result = run_skin_inference(pil_img)
+    # Decode + transform + forward all run on the inference executor
+    try:
+        result = await run_skin_inference_bytes(img_bytes, profile=mode)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
     return {
         "inference_id": str(uuid_lib.uuid4()),
@@ -92,12 +117,80 @@ async def diagnose_skin(file: UploadFile = File(...)):
     }
 
 
+# ============================================================================
+# ENDPOINT 1b: BATCH /infer (NDJSON STREAM, no auth)
+# ============================================================================
+
+@router.post("/infer/batch")
+async def diagnose_skin_batch(
+    files: List[UploadFile] = File(...),
+    mode: Optional[str] = None,
+):
+    """
+    Classify many images in one request (e.g. importing a photo history).
+
+    Up to INFERENCE_BATCH_CONCURRENCY images at a time are decoded on the
+    inference executor and coalesced into batched forward passes, so only
+    that many decoded images / tensors are alive per request. Results stream back as NDJSON in completion
+    order, one line per image:
+        {"index": 3, "filename": "...", "prediction": "...", "confidence": 0.91}
+    Failed images produce {"index": ..., "filename": ..., "error": "..."}.
+    """
+    if len(files) > settings.INFERENCE_BATCH_MAX_FILES:
+        raise HTTPException(
+            400, f"Too many files (max {settings.INFERENCE_BATCH_MAX_FILES})"
+        )
+
+    try:
+        resolve_resolution(mode)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    # Read the (encoded) bytes before streaming: uploads are closed once the
+    # handler returns
+    filenames = [file.filename for file in files]
+    uploads: List[Optional[bytes]] = []
+    for file in files:
+        is_image = bool(file.content_type and file.content_type.startswith("image/"))
+        uploads.append(await file.read() if is_image else None)
+
+    def classify(index: int):
+        async def call() -> dict:
+            img_bytes, uploads[index] = uploads[index], None  # Free once picked up
+            if img_bytes is None:
+                raise ValueError("Invalid image file")
+            return await run_skin_inference_bytes(img_bytes, profile=mode)
+        return call
+
+    async def stream_results():
+        # Pending images are cancelled if the client goes away
+        async for outcome in bounded_as_completed(
+            [classify(i) for i in range(len(uploads))],
+            settings.INFERENCE_BATCH_CONCURRENCY,
+        ):
+            index = outcome["index"]
+            if outcome["error"]:
+                line = {"index": index, "filename": filenames[index], "error": outcome["error"]}
+            else:
+                line = {
+                    "index": index,
+                    "filename": filenames[index],
+                    "inference_id": str(uuid_lib.uuid4()),
+                    "prediction": outcome["result"]["prediction"],
+                    "confidence": outcome["result"]["confidence"],
+                }
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 # ============================================================================
 # ENDPOINT 2: UPLOAD + ANALYZE (FIXED)
 # ============================================================================
 
 @router.post("/upload", response_model=SkinImageUploadResponse)
 async def upload_and_analyze(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     image_type: str = "weekly",
     db: AsyncSession = Depends(get_db),
@@ -115,14 +208,7 @@ async def upload_and_analyze(
     # ML inference
     await file.seek(0)
     img_bytes = await file.read()
-    pil_img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-    inference = run_skin_inference(pil_img)
-
-    # Azure Vision (optional)
-    try:
-        azure = await vision_service.analyze_single_image(file_path)
-    except Exception:
-        azure = None
+    inference = await run_skin_inference_bytes(img_bytes, db=db)
 
     # DB insert (UUID SAFE)
     skin_image = SkinImage(
@@ -138,16 +224,33 @@ async def upload_and_analyze(
         skin_image_id=skin_image.id,
         prediction=inference["prediction"],
         confidence=inference["confidence"],
-        model_version="v1",
+        model_version=MODEL_VERSION,
     )
     db.add(diagnosis)
 
+    # Keep the backbone embedding so later re-scoring / comparisons skip the ViT
+    if inference.get("embedding") is not None:
+        await embedding_store.save(
+            db, skin_image.id, inference["embedding"], inference["resolution"]
+        )
+
+    # Azure Vision (optional) runs after the response; poll /skin/analysis/{id}
+    analysis_status = None
+    if vision_service.is_available():
+        await vision_jobs.enqueue(db, skin_image.id)
+        analysis_status = "pending"
+
     await db.commit()
     await db.refresh(skin_image)
 
+    if analysis_status:
+        background_tasks.add_task(
+            vision_jobs.run, skin_image.id, url_to_filesystem_path(file_path)
+        )
+
     msg = "Image uploaded successfully"
-    if azure:
-        msg += f" | Severity: {azure['severity_score']}/100"
+    if analysis_status:
+        msg += " | Detailed analysis in progress"
 
     return SkinImageUploadResponse(
         image_id=skin_image.id,
@@ -156,7 +259,35 @@ async def upload_and_analyze(
         confidence=inference["confidence"],
         captured_at=skin_image.captured_at,
         message=msg,
+        analysis_status=analysis_status,
+    )
+
+
+# ============================================================================
+# ENDPOINT 2b: VISION ANALYSIS STATUS / RESULT
+# ============================================================================
+
+@router.get("/analysis/{image_id}")
+async def get_vision_analysis(
+    image_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Poll the background Azure Vision analysis started on upload."""
+    result = await db.execute(
+        select(SkinImage.id).where(
+            SkinImage.id == image_id,
+            SkinImage.user_id == user.id,
+        )
     )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(404, "Image not found")
+
+    analysis = await vision_jobs.get(db, image_id)
+    if analysis is None:
+        return {"image_id": str(image_id), "status": "not_started"}
+
+    return vision_jobs.to_dict(analysis)
 
 
 # ============================================================================
@@ -193,10 +324,14 @@ async def get_my_images(
 @router.post("/analyze/{image_id}")
 async def analyze_existing_image(
     image_id: UUID,
+    force: bool = False,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Re-analyze an existing image using Azure Vision."""
+    """
+    Re-analyze an existing image using Azure Vision.
+    A completed stored analysis is returned as-is unless `force=true`.
+    """
     result = await db.execute(
         select(SkinImage).where(
             SkinImage.id == image_id,
@@ -208,6 +343,19 @@ async def analyze_existing_image(
     if not image:
         raise HTTPException(404, "Image not found")
 
+    stored = await vision_jobs.get(db, image_id)
+    if stored and stored.status == "completed" and not force:
+        return {
+            "prediction": stored.condition or "unknown",
+            "confidence": (stored.severity_score or 0) / 100,
+            "severity_score": stored.severity_score or 0,
+            "affected_area": stored.affected_area_percentage or 0,
+            "redness_level": stored.redness_level or 0,
+            "texture_roughness": stored.texture_roughness or 0,
+            "description": stored.description or "",
+            "message": "Stored analysis"
+        }
+
     # Convert URL path to filesystem path
     # image.image_url is like: /uploads/skin_images/file.jpg
     # We need: uploads/skin_images/file.jpg (relative to project root)
@@ -224,6 +372,10 @@ async def analyze_existing_image(
         # Call Azure Vision with filesystem path
         analysis = await vision_service.analyze_single_image(file_path)
         
+        # Persist the full analysis for later reuse
+        stored = stored or await vision_jobs.enqueue(db, image_id)
+        vision_jobs.store_result(stored, analysis)
+        
         # Update diagnosis in database with new analysis
         diag_result = await db.execute(
             select(SkinDiagnosis).where(SkinDiagnosis.skin_image_id == image_id)
@@ -234,7 +386,7 @@ async def analyze_existing_image(
             # Update existing diagnosis
             diagnosis.prediction = analysis.get("condition", "unknown")
             diagnosis.confidence = analysis.get("severity_score", 0) / 100  # Convert to 0-1 scale
-            await db.commit()
+        await db.commit()
         
         return {
             "prediction": analysis.get("condition", "unknown"),
@@ -252,6 +404,12 @@ async def analyze_existing_image(
             status_code=404,
             detail=f"Image file not found: {file_path}"
         )
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_in) + 1)},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -268,9 +426,24 @@ async def analyze_existing_image(
 @router.get("/progress/comparison")
 async def get_weekly_comparison(
     weeks: int = 4,
+    enrich: bool = False,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    """
+    Compare consecutive images in the window locally from classifier
+    probabilities and stored backbone embeddings (milliseconds, no remote
+    calls). With `enrich=true` every pair is also sent to Azure Vision in
+    parallel (COMPARISON_ENRICH_CONCURRENCY at a time, each bounded by
+    COMPARISON_ENRICH_TIMEOUT_S) and the result attached as `llm_analysis`;
+    a failed pair gets `llm_analysis: null` and an `llm_error`.
+
+    With `enrich=true&stream=true` the response is NDJSON: the first line
+    is the usual body with the local comparisons, then one line per pair
+    as its Azure result arrives:
+        {"index": 2, "llm_analysis": {...}, "llm_error": null}
+    """
     end = datetime.utcnow()
     start = end - timedelta(weeks=weeks)
 
@@ -287,26 +460,88 @@ async def get_weekly_comparison(
     if len(images) < 2:
         return {"message": "Not enough images"}
 
-    comparisons = []
-    for i in range(len(images) - 1):
-        # Convert URL paths to filesystem paths
-        before_path = images[i].image_url.lstrip('/')
-        after_path = images[i + 1].image_url.lstrip('/')
-        
-        try:
-            comp = await vision_service.compare_images(before_path, after_path)
-            comparisons.append(comp)
-        except Exception as e:
-            print(f"Comparison failed: {e}")
-            # Continue with next comparison even if one fails
-            continue
+    image_ids = [img.id for img in images]
+    embeddings = await embedding_store.load(db, image_ids)
 
-    return {
+    diag_result = await db.execute(
+        select(SkinDiagnosis).where(SkinDiagnosis.skin_image_id.in_(image_ids))
+    )
+    diagnoses = {d.skin_image_id: d for d in diag_result.scalars().all()}
+
+    # Head-only re-scoring of stored embeddings gives full class probabilities
+    embedded_ids = [img.id for img in images if img.id in embeddings]
+    probabilities = {}
+    if embedded_ids:
+        scores = await classify_embeddings_async(
+            np.stack([embeddings[image_id] for image_id in embedded_ids])
+        )
+        probabilities = {
+            image_id: score["probabilities"]
+            for image_id, score in zip(embedded_ids, scores)
+        }
+
+    items = []
+    for img in images:
+        if img.id in probabilities:
+            probs = probabilities[img.id]
+        elif img.id in diagnoses:
+            diag = diagnoses[img.id]
+            # None for non-classifier labels: the pair reports "insufficient data"
+            probs = LocalComparisonEngine.fallback_probabilities(diag.prediction, diag.confidence)
+        else:
+            continue  # No model output at all for this image
+
+        items.append({
+            "image_id": img.id,
+            "image_url": img.image_url,
+            "captured_at": img.captured_at,
+            "probabilities": probs,
+            "embedding": embeddings.get(img.id),
+        })
+
+    comparisons = comparison_engine.compare_sequence(items)
+    body = {
         "user_id": str(user.id),
         "weeks": weeks,
         "comparisons": comparisons,
     }
 
+    if not enrich:
+        return body
+
+    calls = [
+        lambda before=before, after=after: vision_service.compare_images(
+            url_to_filesystem_path(before["image_url"]),
+            url_to_filesystem_path(after["image_url"]),
+        )
+        for before, after in zip(items, items[1:])
+    ]
+    concurrency = settings.COMPARISON_ENRICH_CONCURRENCY
+    timeout = settings.COMPARISON_ENRICH_TIMEOUT_S
+
+    if stream:
+        async def stream_comparisons():
+            yield json.dumps(body, default=str) + "\n"
+            async for outcome in bounded_as_completed(calls, concurrency, timeout):
+                if outcome["error"]:
+                    print(f"Comparison {outcome['index']} failed: {outcome['error']}")
+                yield json.dumps({
+                    "index": outcome["index"],
+                    "llm_analysis": outcome["result"],
+                    "llm_error": outcome["error"],
+                }, default=str) + "\n"
+
+        return StreamingResponse(stream_comparisons(), media_type="application/x-ndjson")
+
+    outcomes = await bounded_gather(calls, concurrency, timeout)
+    for comp, outcome in zip(comparisons, outcomes):
+        if outcome["error"]:
+            print(f"Comparison {outcome['index']} failed: {outcome['error']}")
+        comp["llm_analysis"] = outcome["result"]
+        comp["llm_error"] = outcome["error"]
+
+    return body
+
 # ============================================================================
 # ENDPOINT 6: DELETE IMAGE
 # ============================================================================
@@ -328,10 +563,20 @@ async def delete_skin_image(
     if not image:
         raise HTTPException(404, "Image not found")
 
+    # Hash before the file is gone so cached vision responses can be dropped
+    # (no-op when the vision cache is disabled)
+    try:
+        image_hashes = await vision_service.cache.hash_files([url_to_filesystem_path(image.image_url)])
+    except OSError:
+        image_hashes = []
+
     storage.delete_image(image.image_url)
     await db.delete(image)
     await db.commit()
 
+    for image_hash in image_hashes:
+        await vision_service.cache.invalidate_image(image_hash)
+
     return {"message": "Deleted", "image_id": str(image_id)}
 
 
@@ -615,4 +860,112 @@ async def compare_two_images(
         "confidence_change": confidence_change,
         "days_between": days_between,
         "summary": summary
-    }
\ No newline at end of file
+    }
+
+
+# ============================================================================
+# ENDPOINT: RE-CLASSIFY FROM STORED EMBEDDINGS (AUTHENTICATED)
+# ============================================================================
+
+@router.post("/reclassify")
+async def reclassify_images(
+    force: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Re-score the user's images with the current classification head using
+    their stored backbone embeddings (head-only, no ViT pass).
+
+    Diagnoses already at the current model version are left alone unless
+    `force=true`. Images without a stored embedding are skipped.
+    """
+    result = await db.execute(
+        select(SkinImage.id).where(SkinImage.user_id == user.id)
+    )
+    image_ids = list(result.scalars().all())
+
+    embeddings = await embedding_store.load(db, image_ids)
+
+    diag_result = await db.execute(
+        select(SkinDiagnosis).where(SkinDiagnosis.skin_image_id.in_(list(embeddings)))
+    )
+    diagnoses = {d.skin_image_id: d for d in diag_result.scalars().all()}
+
+    targets = [
+        image_id for image_id in embeddings
+        if force
+        or image_id not in diagnoses
+        or diagnoses[image_id].model_version != MODEL_VERSION
+    ]
+
+    if targets:
+        scores = await classify_embeddings_async(
+            np.stack([embeddings[image_id] for image_id in targets])
+        )
+
+        for image_id, score in zip(targets, scores):
+            diagnosis = diagnoses.get(image_id)
+            if diagnosis is None:
+                diagnosis = SkinDiagnosis(skin_image_id=image_id)
+                db.add(diagnosis)
+            diagnosis.prediction = score["prediction"]
+            diagnosis.confidence = score["confidence"]
+            diagnosis.model_version = MODEL_VERSION
+
+        await db.commit()
+
+    return {
+        "model_version": MODEL_VERSION,
+        "rescored": len(targets),
+        "up_to_date": len(embeddings) - len(targets),
+        "skipped_no_embedding": len(image_ids) - len(embeddings),
+    }
+
+
+# ============================================================================
+# ENDPOINT: SIMILAR IMAGES BY EMBEDDING (AUTHENTICATED)
+# ============================================================================
+
+@router.get("/similar/{image_id}")
+async def get_similar_images(
+    image_id: UUID,
+    limit: int = 5,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Rank the user's other images by cosine similarity of stored embeddings."""
+    result = await db.execute(
+        select(SkinImage).where(SkinImage.user_id == user.id)
+    )
+    images = {img.id: img for img in result.scalars().all()}
+
+    if image_id not in images:
+        raise HTTPException(404, "Image not found")
+
+    embeddings = await embedding_store.load(db, list(images))
+    if image_id not in embeddings:
+        raise HTTPException(404, "No stored embedding for this image")
+
+    query = embeddings.pop(image_id)
+    ranked = sorted(
+        (
+            (cosine_similarity(query, vector), other_id)
+            for other_id, vector in embeddings.items()
+        ),
+        key=lambda pair: pair[0],
+        reverse=True,
+    )[:limit]
+
+    return {
+        "image_id": str(image_id),
+        "similar": [
+            {
+                "image_id": str(other_id),
+                "image_url": images[other_id].image_url,
+                "captured_at": images[other_id].captured_at.isoformat(),
+                "similarity": similarity,
+            }
+            for similarity, other_id in ranked
+        ],
+    }
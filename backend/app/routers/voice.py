@@ -18,6 +18,7 @@ from app.entities.user import User
 from app.services.voice_prompt_selector import VoicePromptSelector
 from app.services.mood_inference_service import MoodInferenceService
 from app.utils.llm_client import LLMClient
+from app.utils.llm_governor import CircuitOpenError
 
 router = APIRouter(prefix="/voice", tags=["Voice Agent"])
 prompt_selector = VoicePromptSelector()
@@ -257,6 +258,13 @@ async def analyze_voice_mood(
             "message": "Voice mood analysis complete"
         }
 
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_in) + 1)},
+        )
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -21,3 +21,19 @@ class WeeklyReportAPIResponse(BaseModel):
     recommendations: List[Recommendation]
 
     generated_at: datetime
+
+
+class ReportRangeFailure(BaseModel):
+    week_start: date
+    error: str
+
+
+class WeeklyReportRangeResponse(BaseModel):
+    """Weekly reports over a range of weeks (oldest first)"""
+    user_id: UUID
+    start: date
+    end: date
+
+    reports: List[WeeklyReportAPIResponse]
+    no_data_weeks: List[date]
+    failed_weeks: List[ReportRangeFailure]
@@ -11,6 +11,7 @@ class SkinImageUploadResponse(BaseModel):
     confidence: float
     captured_at: datetime
     message: str = "Image uploaded and analyzed successfully"
+    analysis_status: Optional[str] = None  # Azure Vision job: pending / None if disabled
 
 # Response schemas
 class SkinImageDetail(BaseModel):
@@ -1,24 +1,87 @@
 import os
-import base64
-from typing import Tuple, Dict
-from openai import AzureOpenAI
+import json
+import asyncio
+from typing import Tuple, Dict, List, Optional
 from app.core.config import settings
+from app.utils.azure_openai import get_async_client
+from app.utils.image import VisionImageEncoder
+from app.utils.llm_governor import estimate_chat_tokens, get_chat_governor
+from app.services.vision_cache import VisionCache
+
+# Bump when a prompt changes so cached responses from the old prompt are ignored
+ANALYSIS_PROMPT_VERSION = "analysis-v1"
+COMPARISON_PROMPT_VERSION = "comparison-v1"
+
+# One cap on in-flight vision calls per process, shared by every service instance
+_VISION_LIMITER: Optional[asyncio.Semaphore] = None
+
+
+def get_vision_limiter() -> asyncio.Semaphore:
+    global _VISION_LIMITER
+
+    if _VISION_LIMITER is None:
+        _VISION_LIMITER = asyncio.Semaphore(settings.VISION_MAX_CONCURRENCY)
+    return _VISION_LIMITER
 
 class AzureVisionService:
     """Service for Azure OpenAI Vision API interactions."""
     
     def __init__(self):
-        self.client = AzureOpenAI(
-            api_key=settings.AZURE_OPENAI_API_KEY,
-            api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
-        )
+        # Shared pooled async client; the process-wide semaphore caps in-flight vision calls
+        self.client = get_async_client()
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT
+        self.timeout = settings.VISION_TIMEOUT_S
+        self._limiter = get_vision_limiter()
+        # Per-deployment rate limits, retries and circuit breaker (shared with reports/voice)
+        self.governor = get_chat_governor()
+        self.encoder = VisionImageEncoder(
+            max_long_side=settings.VISION_IMAGE_MAX_LONG_SIDE,
+            max_short_side=settings.VISION_IMAGE_MAX_SHORT_SIDE,
+            quality=settings.VISION_IMAGE_QUALITY,
+            image_format=settings.VISION_IMAGE_FORMAT,
+            cache_max_bytes=settings.VISION_IMAGE_CACHE_MB * 1024 * 1024,
+        )
+        self.cache = VisionCache(
+            deployment=self.deployment,
+            ttl_hours=settings.VISION_CACHE_TTL_HOURS,
+            enabled=settings.VISION_CACHE_ENABLED,
+        )
+    
+    def is_available(self) -> bool:
+        """Check if Azure Vision is configured and not failing fast (breaker open)"""
+        configured = bool(settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_ENDPOINT)
+        return configured and not self.governor.is_open()
     
     def _encode_image(self, image_path: str) -> str:
-        """Encode image to base64."""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+        """Encode image as a data URL (downscaled, EXIF-stripped, re-encoded, cached)."""
+        payload, mime_type = self.encoder.encode(image_path)
+        return f"data:{mime_type};base64,{payload}"
+    
+    async def _chat_json(self, content: List[Dict], max_tokens: int) -> Dict:
+        """
+        Run one vision chat completion and parse its JSON answer.
+        Bounded by the concurrency limiter, the deployment governor and a
+        per-attempt timeout; cancelling the caller cancels the in-flight
+        HTTP request.
+        """
+        messages = [{"role": "user", "content": content}]
+        
+        async with self._limiter:
+            response = await self.governor.call(
+                lambda: asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=self.deployment,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=0.3,  # Lower temperature for more consistent medical analysis
+                        timeout=self.timeout,
+                    ),
+                    timeout=self.timeout,
+                ),
+                estimated_tokens=estimate_chat_tokens(messages, max_tokens),
+            )
+        
+        return json.loads(response.choices[0].message.content)
     
     async def analyze_single_image(self, image_path: str) -> Dict:
         """
@@ -36,7 +99,12 @@ class AzureVisionService:
             }
         """
         
-        base64_image = self._encode_image(image_path)
+        hashes = await self.cache.hash_files([image_path])
+        cached = await self.cache.get("analysis", hashes, ANALYSIS_PROMPT_VERSION)
+        if cached is not None:
+            return cached
+        
+        image_url = await asyncio.to_thread(self._encode_image, image_path)
         
         prompt = """You are a dermatology AI assistant. Analyze this skin condition image and provide:
 
@@ -59,29 +127,20 @@ Respond ONLY in this JSON format:
     "description": "Clinical description here"
 }"""
 
-        response = self.client.chat.completions.create(
-            model=self.deployment,
-            messages=[
+        result = await self._chat_json(
+            [
+                {"type": "text", "text": prompt},
                 {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_url
+                    }
                 }
             ],
             max_tokens=500,
-            temperature=0.3  # Lower temperature for more consistent medical analysis
         )
         
-        # Parse JSON response
-        import json
-        result = json.loads(response.choices[0].message.content)
+        await self.cache.set("analysis", hashes, ANALYSIS_PROMPT_VERSION, result)
         return result
     
     async def compare_images(
@@ -103,8 +162,15 @@ Respond ONLY in this JSON format:
             }
         """
         
-        before_base64 = self._encode_image(before_image_path)
-        after_base64 = self._encode_image(after_image_path)
+        hashes = await self.cache.hash_files([before_image_path, after_image_path])
+        cached = await self.cache.get("comparison", hashes, COMPARISON_PROMPT_VERSION)
+        if cached is not None:
+            return cached
+        
+        before_url, after_url = await asyncio.gather(
+            asyncio.to_thread(self._encode_image, before_image_path),
+            asyncio.to_thread(self._encode_image, after_image_path),
+        )
         
         prompt = """You are a dermatology AI assistant comparing two skin condition images taken over time.
 
@@ -133,35 +199,27 @@ Respond ONLY in this JSON format:
     "recommendations": ["Continue current treatment", "Monitor for..."]
 }"""
 
-        response = self.client.chat.completions.create(
-            model=self.deployment,
-            messages=[
+        result = await self._chat_json(
+            [
+                {"type": "text", "text": prompt},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": before_url,
+                        "detail": "high"  # Use high detail for medical images
+                    }
+                },
                 {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{before_base64}",
-                                "detail": "high"  # Use high detail for medical images
-                            }
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{after_base64}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
+                    "type": "image_url",
+                    "image_url": {
+                        "url": after_url,
+                        "detail": "high"
+                    }
                 }
             ],
             max_tokens=800,
-            temperature=0.3
         )
         
-        import json
-        result = json.loads(response.choices[0].message.content)
+        await self.cache.set("comparison", hashes, COMPARISON_PROMPT_VERSION, result)
         return result
 
@@ -0,0 +1,56 @@
+from typing import Dict, List
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.skin_embedding import SkinEmbedding
+from app.models.embeddings import decode_embedding, encode_embedding
+from app.models.model import BACKBONE_VERSION
+
+
+class EmbeddingStore:
+    """Persists DINOv2 backbone embeddings per SkinImage (float16 bytea)."""
+
+    async def save(
+        self,
+        db: AsyncSession,
+        skin_image_id: UUID,
+        embedding: np.ndarray,
+        resolution: int,
+    ):
+        vector = np.asarray(embedding).ravel()
+        values = {
+            "skin_image_id": skin_image_id,
+            "backbone_version": BACKBONE_VERSION,
+            "resolution": resolution,
+            "dim": int(vector.shape[0]),
+            "vector": encode_embedding(vector),
+        }
+
+        await db.execute(
+            insert(SkinEmbedding)
+            .values(**values)
+            .on_conflict_do_update(
+                index_elements=["skin_image_id"],
+                set_={k: v for k, v in values.items() if k != "skin_image_id"},
+            )
+        )
+
+    async def load(self, db: AsyncSession, image_ids: List[UUID]) -> Dict[UUID, np.ndarray]:
+        """Embeddings for `image_ids` from the current backbone version (missing ids omitted)."""
+        if not image_ids:
+            return {}
+
+        result = await db.execute(
+            select(SkinEmbedding).where(
+                SkinEmbedding.skin_image_id.in_(image_ids),
+                SkinEmbedding.backbone_version == BACKBONE_VERSION,
+            )
+        )
+        return {
+            row.skin_image_id: decode_embedding(row.vector)
+            for row in result.scalars().all()
+        }
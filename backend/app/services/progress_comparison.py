@@ -0,0 +1,180 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models.embeddings import cosine_similarity
+from app.models.model import IDX2LABEL
+
+LABELS = list(IDX2LABEL.values())
+
+
+class LocalComparisonEngine:
+    """
+    Scores change between two skin images from classifier outputs only
+    (class probabilities + stored backbone embeddings) — no remote calls.
+
+    Returns the same shape as AzureVisionService.compare_images, plus
+    `embedding_distance`, `probability_deltas` and `severity_basis`. Fields
+    the classifier can't measure (affected area, redness, texture) are
+    reported as "not assessed".
+
+    The "severity" scores here are not a clinical grading: they are the
+    classifier's confidence that the skin is not normal, 100 * (1 - P(normal)).
+    A sharper photo of the same lesion can move them as much as real change.
+    """
+
+    # Minimum score improvement (in %) that counts as improvement
+    IMPROVEMENT_THRESHOLD = 10.0
+
+    SEVERITY_BASIS = "classifier confidence: 100 * (1 - P(normal)), not a clinical severity grade"
+
+    @staticmethod
+    def fallback_probabilities(prediction: str, confidence: Optional[float]) -> Optional[Dict[str, float]]:
+        """
+        Approximate a distribution when only prediction/confidence are stored.
+        None when the stored prediction isn't one of the classifier's labels
+        (e.g. an Azure Vision diagnosis), since there's nothing to compare.
+        """
+        if prediction not in LABELS or confidence is None:
+            return None
+        confidence = min(max(confidence, 0.0), 1.0)
+        rest = (1.0 - confidence) / max(len(LABELS) - 1, 1)
+        return {label: (confidence if label == prediction else rest) for label in LABELS}
+
+    @staticmethod
+    def condition_confidence_score(probabilities: Dict[str, float]) -> float:
+        """
+        Confidence-based severity heuristic: 0 = confidently normal skin,
+        100 = confidently some skin condition. Not a measure of how severe
+        the condition is.
+        """
+        return round(100 * (1.0 - probabilities.get("normal", 0.0)), 1)
+
+    @staticmethod
+    def severity_label(score: float) -> str:
+        if score < 34:
+            return "mild"
+        if score < 67:
+            return "moderate"
+        return "severe"
+
+    def compare(
+        self,
+        before: Dict,
+        after: Dict,
+    ) -> Dict:
+        """
+        `before` / `after`: {"image_id", "captured_at", "probabilities",
+        "embedding" (optional np.ndarray)}; `probabilities` is None when the
+        image has no usable classifier output.
+        """
+        before_probs = before["probabilities"]
+        after_probs = after["probabilities"]
+
+        if before_probs is None or after_probs is None:
+            return self._insufficient_data(before, after)
+
+        before_score = self.condition_confidence_score(before_probs)
+        after_score = self.condition_confidence_score(after_probs)
+
+        if before_score > 0:
+            improvement = (before_score - after_score) / before_score * 100
+        else:
+            improvement = -after_score
+        improvement = round(improvement, 1)
+
+        deltas = {
+            label: round(after_probs.get(label, 0.0) - before_probs.get(label, 0.0), 4)
+            for label in LABELS
+        }
+
+        distance = self._embedding_distance(before.get("embedding"), after.get("embedding"))
+
+        before_condition = max(before_probs, key=before_probs.get)
+        after_condition = max(after_probs, key=after_probs.get)
+        before_severity = self.severity_label(before_score)
+        after_severity = self.severity_label(after_score)
+
+        return {
+            "improvement_detected": improvement > self.IMPROVEMENT_THRESHOLD,
+            "improvement_percentage": improvement,
+            "severity_change": f"{before_severity} -> {after_severity}",
+            "before_severity_score": int(round(before_score)),
+            "after_severity_score": int(round(after_score)),
+            "affected_area_change": "not assessed",
+            "redness_change": "not assessed",
+            "texture_change": "not assessed",
+            "detailed_analysis": self._describe(
+                before_condition, after_condition, before_score, after_score, distance
+            ),
+            "recommendations": self._recommend(improvement, after_condition),
+            "before_image_id": str(before["image_id"]),
+            "after_image_id": str(after["image_id"]),
+            "comparison_date": datetime.utcnow().isoformat(),
+            "embedding_distance": distance,
+            "probability_deltas": deltas,
+            "severity_basis": self.SEVERITY_BASIS,
+            "source": "local",
+        }
+
+    def _insufficient_data(self, before: Dict, after: Dict) -> Dict:
+        return {
+            "improvement_detected": None,
+            "improvement_percentage": None,
+            "severity_change": "insufficient data",
+            "before_severity_score": None,
+            "after_severity_score": None,
+            "affected_area_change": "not assessed",
+            "redness_change": "not assessed",
+            "texture_change": "not assessed",
+            "detailed_analysis": (
+                "Insufficient data: at least one image has no classifier "
+                "probabilities to compare."
+            ),
+            "recommendations": ["Upload a new photo so it can be compared with the next one"],
+            "before_image_id": str(before["image_id"]),
+            "after_image_id": str(after["image_id"]),
+            "comparison_date": datetime.utcnow().isoformat(),
+            "embedding_distance": self._embedding_distance(before.get("embedding"), after.get("embedding")),
+            "probability_deltas": None,
+            "severity_basis": self.SEVERITY_BASIS,
+            "source": "local",
+        }
+
+    def compare_sequence(self, items: List[Dict]) -> List[Dict]:
+        """Compare each consecutive pair in `items` (ordered by capture time)."""
+        return [self.compare(items[i], items[i + 1]) for i in range(len(items) - 1)]
+
+    @staticmethod
+    def _embedding_distance(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> Optional[float]:
+        if a is None or b is None:
+            return None
+        return round(1.0 - cosine_similarity(a, b), 4)
+
+    @staticmethod
+    def _describe(before_condition, after_condition, before_score, after_score, distance) -> str:
+        if before_condition == after_condition:
+            text = f"Classifier reads {after_condition} in both images"
+        else:
+            text = f"Classifier reading changed from {before_condition} to {after_condition}"
+
+        text += f"; condition-confidence score moved from {before_score:.0f} to {after_score:.0f}."
+
+        if distance is not None:
+            if distance < 0.05:
+                text += " The images look visually very similar."
+            elif distance < 0.2:
+                text += " Moderate visual change between the images."
+            else:
+                text += " Substantial visual change between the images (check lighting / framing)."
+        return text
+
+    def _recommend(self, improvement: float, after_condition: str) -> List[str]:
+        if after_condition == "normal":
+            return ["Keep up your current skin care routine", "Continue weekly photos to confirm the trend"]
+        if improvement > self.IMPROVEMENT_THRESHOLD:
+            return ["Continue current treatment", "Keep tracking weekly in consistent lighting"]
+        if improvement < -self.IMPROVEMENT_THRESHOLD:
+            return ["Condition may be worsening - consider consulting a dermatologist", "Note any new triggers or products"]
+        return ["Condition appears stable - continue monitoring", "Discuss treatment adjustments with a dermatologist if progress stalls"]
@@ -5,15 +5,65 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, func
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID
+from collections import defaultdict
 import json
 
 from app.entities.skin_image import SkinImage
 from app.entities.skin_diagnosis import SkinDiagnosis
 from app.entities.improvement_record import ImprovementRecord
+from app.entities.skin_vision_analysis import SkinVisionAnalysis
 from app.core.config import settings
 from app.services.improvement_analyzer import ImprovementAnalyzer
+from app.utils.azure_openai import get_async_client
+from app.utils.json_stream import TopLevelJSONStream
+from app.utils.llm_governor import estimate_chat_tokens, get_chat_governor
+
+def _compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def summarize_daily_diagnoses(diagnoses: List[Dict]) -> List[Dict]:
+    """
+    Collapse per-image diagnoses into one entry per day, so the prompt
+    grows with days tracked (at most 7) rather than with images uploaded:
+
+        {"date": "2024-05-06", "images": 4,
+         "conditions": {"eczema": {"count": 3, "mean_confidence": 0.82,
+                                   "min_confidence": 0.71, "max_confidence": 0.9}},
+         "mean_severity_score": 41.5}
+    """
+    days = defaultdict(list)
+    for diag in diagnoses:
+        days[diag["date"][:10]].append(diag)
+
+    summary = []
+    for day in sorted(days):
+        entries = days[day]
+
+        by_condition = defaultdict(list)
+        for entry in entries:
+            by_condition[entry["condition"]].append(entry["confidence"])
+
+        conditions = {}
+        for condition, confidences in sorted(by_condition.items()):
+            conditions[condition] = {
+                "count": len(confidences),
+                "mean_confidence": round(sum(confidences) / len(confidences), 2),
+                "min_confidence": round(min(confidences), 2),
+                "max_confidence": round(max(confidences), 2),
+            }
+
+        day_summary = {"date": day, "images": len(entries), "conditions": conditions}
+
+        scores = [e["severity_score"] for e in entries if e.get("severity_score") is not None]
+        if scores:
+            day_summary["mean_severity_score"] = round(sum(scores) / len(scores), 1)
+
+        summary.append(day_summary)
+    return summary
+
 
 class ReportGenerator:
     """Generates comprehensive weekly reports using Azure OpenAI"""
@@ -21,20 +71,40 @@ class ReportGenerator:
     def __init__(self):
         self.analyzer = ImprovementAnalyzer()
         
-        # Initialize Azure OpenAI client if configured
+        # Shared pooled async client (see app/utils/azure_openai.py) if configured
         if settings.AZURE_OPENAI_API_KEY:
-            from openai import AzureOpenAI
-            self.client = AzureOpenAI(
-                api_key=settings.AZURE_OPENAI_API_KEY,
-                api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
-            )
+            self.client = get_async_client()
         else:
             self.client = None
+        
+        self.governor = get_chat_governor()
     
     def is_available(self) -> bool:
-        """Check if report generation is available"""
-        return self.client is not None
+        """Check if report generation is available (configured, breaker not open)"""
+        return self.client is not None and not self.governor.is_open()
+    
+    @staticmethod
+    def _images_query(user_id: UUID, start: date, end: date):
+        # Stored Azure Vision analyses (from upload jobs) are reused, not re-requested
+        return (
+            select(SkinImage, SkinDiagnosis, SkinVisionAnalysis.severity_score)
+            .join(SkinDiagnosis, SkinImage.id == SkinDiagnosis.skin_image_id)
+            .outerjoin(
+                SkinVisionAnalysis,
+                and_(
+                    SkinVisionAnalysis.skin_image_id == SkinImage.id,
+                    SkinVisionAnalysis.status == "completed",
+                )
+            )
+            .where(
+                and_(
+                    SkinImage.user_id == user_id,
+                    SkinImage.captured_at >= datetime.combine(start, datetime.min.time()),
+                    SkinImage.captured_at <= datetime.combine(end, datetime.max.time())
+                )
+            )
+            .order_by(SkinImage.captured_at.asc())
+        )
     
     async def gather_weekly_context(
         self,
@@ -46,35 +116,102 @@ class ReportGenerator:
         """Gather all data for the week to send to LLM"""
         
         # Get all skin images and diagnoses for the week
+        result = await db.execute(self._images_query(user_id, week_start, week_end))
+        images_data = result.all()
+        
+        if not images_data:
+            return None
+        
+        # Get improvement records for this week and the previous one
+        prev_week_start = week_start - timedelta(days=7)
         result = await db.execute(
-            select(SkinImage, SkinDiagnosis)
-            .join(SkinDiagnosis, SkinImage.id == SkinDiagnosis.skin_image_id)
-            .where(
+            select(ImprovementRecord).where(
                 and_(
-                    SkinImage.user_id == user_id,
-                    SkinImage.captured_at >= datetime.combine(week_start, datetime.min.time()),
-                    SkinImage.captured_at <= datetime.combine(week_end, datetime.max.time())
+                    ImprovementRecord.user_id == user_id,
+                    ImprovementRecord.week_start_date.in_([week_start, prev_week_start])
                 )
             )
-            .order_by(SkinImage.captured_at.asc())
         )
-        images_data = result.all()
+        records = {r.week_start_date: r for r in result.scalars().all()}
         
-        if not images_data:
-            return None
+        return self.build_weekly_context(
+            week_start,
+            week_end,
+            images_data,
+            records.get(week_start),
+            records.get(prev_week_start),
+        )
+    
+    async def gather_range_contexts(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        first_week_start: date,
+        weeks: int
+    ) -> Dict[date, Dict]:
+        """
+        Contexts for `weeks` consecutive weeks from two queries in total
+        (images + diagnoses for the whole range, improvement records),
+        bucketed by week in one pass. Weeks without images are omitted.
+        """
+        range_end = first_week_start + timedelta(weeks=weeks, days=-1)
+        
+        result = await db.execute(self._images_query(user_id, first_week_start, range_end))
+        images_by_week = defaultdict(list)
+        for row in result.all():
+            captured = row[0].captured_at.date()
+            images_by_week[captured - timedelta(days=captured.weekday())].append(row)
+        
+        result = await db.execute(
+            select(ImprovementRecord).where(
+                and_(
+                    ImprovementRecord.user_id == user_id,
+                    ImprovementRecord.week_start_date >= first_week_start - timedelta(days=7),
+                    ImprovementRecord.week_start_date <= range_end
+                )
+            )
+        )
+        records = {r.week_start_date: r for r in result.scalars().all()}
+        
+        contexts = {}
+        for week_start, images_data in sorted(images_by_week.items()):
+            contexts[week_start] = self.build_weekly_context(
+                week_start,
+                week_start + timedelta(days=6),
+                images_data,
+                records.get(week_start),
+                records.get(week_start - timedelta(days=7)),
+            )
+        return contexts
+    
+    @staticmethod
+    def build_weekly_context(
+        week_start: date,
+        week_end: date,
+        images_data: List,
+        improvement_record: Optional[ImprovementRecord],
+        previous_week_record: Optional[ImprovementRecord]
+    ) -> Dict:
+        """LLM context from one week's (image, diagnosis, severity_score) rows"""
         
         # Build diagnoses list
         diagnoses_list = []
         conditions = []
         confidences = []
         
-        for img, diag in images_data:
-            diagnoses_list.append({
+        severities = []
+        
+        for img, diag, severity_score in images_data:
+            entry = {
                 "date": img.captured_at.isoformat(),
                 "condition": diag.prediction,
                 "confidence": diag.confidence,
                 "image_type": img.image_type
-            })
+            }
+            if severity_score is not None:
+                entry["severity_score"] = severity_score
+                severities.append(severity_score)
+            diagnoses_list.append(entry)
             conditions.append(diag.prediction)
             confidences.append(diag.confidence)
         
@@ -83,38 +220,14 @@ class ReportGenerator:
         primary_condition = Counter(conditions).most_common(1)[0][0]
         average_confidence = sum(confidences) / len(confidences)
         
-        # Get improvement record if exists
-        result = await db.execute(
-            select(ImprovementRecord).where(
-                and_(
-                    ImprovementRecord.user_id == user_id,
-                    ImprovementRecord.week_start_date == week_start
-                )
-            )
-        )
-        improvement_record = result.scalar_one_or_none()
-        
-        # Get previous week for comparison
-        prev_week_start = week_start - timedelta(days=7)
-        prev_week_end = prev_week_start + timedelta(days=6)
-        
-        result = await db.execute(
-            select(ImprovementRecord).where(
-                and_(
-                    ImprovementRecord.user_id == user_id,
-                    ImprovementRecord.week_start_date == prev_week_start
-                )
-            )
-        )
-        previous_week_record = result.scalar_one_or_none()
-        
         # Build current week data
         current_week_data = {
             "primary_condition": primary_condition,
             "average_confidence": average_confidence,
             "improvement_percentage": None,
             "severity_trend": "unknown",
-            "medical_advice": None
+            "medical_advice": None,
+            "average_severity_score": sum(severities) / len(severities) if severities else None
         }
         
         if improvement_record:
@@ -122,7 +235,10 @@ class ReportGenerator:
                 "improvement_percentage": improvement_record.improvement_percentage,
                 "severity_trend": improvement_record.severity_trend or "unknown",
                 "medical_advice": improvement_record.medical_advice,
-                "average_severity_score": improvement_record.average_severity_score
+                "average_severity_score": (
+                    improvement_record.average_severity_score
+                    or current_week_data["average_severity_score"]
+                )
             })
         
         # Build previous week data
@@ -148,15 +264,8 @@ class ReportGenerator:
         
         return context
     
-    async def generate_report_with_llm(
-        self,
-        context: Dict,
-        user_id: UUID
-    ) -> Dict:
-        """Use Azure OpenAI to generate comprehensive report"""
-        
-        if not self.is_available():
-            raise Exception("Azure OpenAI not configured")
+    def build_report_messages(self, context: Dict) -> List[Dict]:
+        """Chat messages asking the LLM for the weekly report JSON"""
         
         week_start = context["week_period"]["start"]
         week_end = context["week_period"]["end"]
@@ -171,11 +280,11 @@ class ReportGenerator:
 - Improvement vs last week: {current_week.get("improvement_percentage", "N/A")}%
 - Severity trend: {current_week.get("severity_trend", "unknown")}
 
-**Detailed Diagnoses:**
-{json.dumps(context["diagnoses"], indent=2)}
+**Daily Diagnosis Summary** (per condition: image count and classifier confidence):
+{_compact_json(summarize_daily_diagnoses(context["diagnoses"]))}
 
 **Previous Week Comparison:**
-{json.dumps(context.get("previous_week", {}), indent=2)}
+{_compact_json(context.get("previous_week") or {})}
 
 Generate a comprehensive medical report in JSON format with:
 
@@ -223,32 +332,43 @@ Respond ONLY with valid JSON in this exact structure:
 
 Be encouraging but honest. Use medical terminology accurately but explain it clearly. Focus on actionable insights."""
 
+        return [
+            {
+                "role": "system",
+                "content": "You are a compassionate dermatology AI assistant creating personalized weekly skin health reports. Be professional, encouraging, and actionable."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    async def generate_report_with_llm(
+        self,
+        context: Dict,
+        user_id: UUID
+    ) -> Dict:
+        """Use Azure OpenAI to generate comprehensive report"""
+        
+        if not self.is_available():
+            raise Exception("Azure OpenAI not configured")
+        
+        messages = self.build_report_messages(context)
+        
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AZURE_OPENAI_DEPLOYMENT,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a compassionate dermatology AI assistant creating personalized weekly skin health reports. Be professional, encouraging, and actionable."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.7
+            response = await self.governor.call(
+                lambda: self.client.chat.completions.create(
+                    model=settings.AZURE_OPENAI_DEPLOYMENT,
+                    messages=messages,
+                    max_tokens=2000,
+                    temperature=0.7,
+                    response_format={"type": "json_object"},
+                ),
+                estimated_tokens=estimate_chat_tokens(messages, 2000),
             )
             
-            # Parse JSON response
+            # JSON mode: the content is a bare JSON object (no code fences)
             response_text = response.choices[0].message.content
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            elif response_text.startswith("```"):
-                response_text = response_text.replace("```", "").strip()
-            
             report_json = json.loads(response_text)
             return report_json
             
@@ -260,186 +380,41 @@ Be encouraging but honest. Use medical terminology accurately but explain it cle
             print(f"LLM generation error: {e}")
             raise
     
-    def generate_html_report(
+    async def stream_report_with_llm(
         self,
-        report_data: Dict,
-        context: Dict
-    ) -> str:
-        """Generate rich HTML for in-app display"""
+        context: Dict,
+        user_id: UUID
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of generate_report_with_llm: yields each top-level
+        report field as (key, value) as soon as the model has finished it.
+        """
         
-        week_start = context["week_period"]["start"]
-        week_end = context["week_period"]["end"]
-        current_week = context.get("current_week", {})
+        if not self.is_available():
+            raise Exception("Azure OpenAI not configured")
         
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #f5f5f5;
-        }}
-        .report-header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            border-radius: 12px;
-            margin-bottom: 20px;
-        }}
-        .report-title {{
-            font-size: 28px;
-            font-weight: bold;
-            margin: 0 0 10px 0;
-        }}
-        .week-period {{
-            font-size: 14px;
-            opacity: 0.9;
-        }}
-        .section {{
-            background: white;
-            padding: 20px;
-            border-radius: 12px;
-            margin-bottom: 20px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .section-title {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #667eea;
-            margin-bottom: 15px;
-        }}
-        .insight {{
-            padding: 15px;
-            margin-bottom: 10px;
-            border-radius: 8px;
-            border-left: 4px solid;
-        }}
-        .insight.positive {{ 
-            background: #f0fdf4; 
-            border-color: #10b981;
-        }}
-        .insight.negative {{ 
-            background: #fef2f2; 
-            border-color: #ef4444;
-        }}
-        .insight.neutral {{ 
-            background: #f0f9ff; 
-            border-color: #3b82f6;
-        }}
-        .insight-title {{
-            font-weight: 600;
-            margin-bottom: 5px;
-        }}
-        .recommendation {{
-            padding: 15px;
-            margin-bottom: 10px;
-            background: #fafafa;
-            border-radius: 8px;
-            border-left: 3px solid #667eea;
-        }}
-        .priority-badge {{
-            display: inline-block;
-            padding: 2px 8px;
-            border-radius: 4px;
-            font-size: 12px;
-            font-weight: 600;
-            margin-left: 10px;
-        }}
-        .priority-high {{ background: #fecaca; color: #991b1b; }}
-        .priority-medium {{ background: #fed7aa; color: #9a3412; }}
-        .priority-low {{ background: #bfdbfe; color: #1e3a8a; }}
-        .metrics-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 15px;
-            margin-top: 15px;
-        }}
-        .metric-card {{
-            background: #f8fafc;
-            padding: 15px;
-            border-radius: 8px;
-            text-align: center;
-        }}
-        .metric-value {{
-            font-size: 24px;
-            font-weight: bold;
-            color: #667eea;
-        }}
-        .metric-label {{
-            font-size: 12px;
-            color: #64748b;
-            margin-top: 5px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="report-header">
-        <div class="report-title">{report_data.get('report_title', 'Weekly Health Report')}</div>
-        <div class="week-period">{week_start} to {week_end}</div>
-    </div>
-    
-    <div class="section">
-        <div class="section-title">📋 Summary</div>
-        <p>{report_data.get('condition_summary', 'Report generated successfully.')}</p>
-    </div>
-    
-    <div class="section">
-        <div class="section-title">💡 Key Insights</div>
-        {''.join([f'''
-        <div class="insight {insight.get('severity', 'neutral')}">
-            <div class="insight-title">{insight.get('icon', '📊')} {insight.get('title', 'Insight')}</div>
-            <div>{insight.get('description', '')}</div>
-        </div>
-        ''' for insight in report_data.get('key_insights', [])])}
-    </div>
-    
-    <div class="section">
-        <div class="section-title">🎯 Recommendations</div>
-        {''.join([f'''
-        <div class="recommendation">
-            <div>
-                <strong>{rec.get('action', '')}</strong>
-                <span class="priority-badge priority-{rec.get('priority', 'medium')}">{rec.get('priority', 'MEDIUM').upper()}</span>
-            </div>
-            <div style="margin-top: 8px; color: #666; font-size: 14px;">
-                {rec.get('reasoning', '')}
-            </div>
-        </div>
-        ''' for rec in report_data.get('recommendations', [])])}
-    </div>
-    
-    <div class="section">
-        <div class="section-title">📊 This Week's Metrics</div>
-        <p>{report_data.get('metrics_interpretation', 'No metrics interpretation available.')}</p>
-        <div class="metrics-grid">
-            <div class="metric-card">
-                <div class="metric-value">{context['total_images']}</div>
-                <div class="metric-label">Images Uploaded</div>
-            </div>
-            <div class="metric-card">
-                <div class="metric-value">{current_week.get('average_confidence', 0):.0%}</div>
-                <div class="metric-label">Avg Confidence</div>
-            </div>
-            <div class="metric-card">
-                <div class="metric-value">{current_week.get('improvement_percentage') or 0:+.1f}%</div>
-                <div class="metric-label">Change vs Last Week</div>
-            </div>
-        </div>
-    </div>
-    
-    <div class="section">
-        <div class="section-title">🔮 Next Steps</div>
-        <p>{report_data.get('next_steps', 'Continue tracking your progress weekly.')}</p>
-    </div>
-</body>
-</html>
-"""
-        return html
\ No newline at end of file
+        messages = self.build_report_messages(context)
+        
+        stream = await self.governor.call(
+            lambda: self.client.chat.completions.create(
+                model=settings.AZURE_OPENAI_DEPLOYMENT,
+                messages=messages,
+                max_tokens=2000,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                stream=True,
+            ),
+            estimated_tokens=estimate_chat_tokens(messages, 2000),
+        )
+        
+        parser = TopLevelJSONStream()
+        async for chunk in stream:
+            if not chunk.choices:
+                continue  # Azure sends a prompt-filter chunk first
+            delta = chunk.choices[0].delta.content
+            if delta:
+                for key, value in parser.feed(delta):
+                    yield key, value
+        
+        if not parser.complete:
+            raise Exception("LLM stream ended before the report JSON was complete")
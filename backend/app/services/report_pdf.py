@@ -0,0 +1,210 @@
+import asyncio
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.weekly_report import WeeklyReport
+from app.services.storage import StorageService
+from app.utils.singleflight import SingleFlight
+
+PRIORITY_COLORS = {"high": "#991b1b", "medium": "#9a3412", "low": "#1e3a8a"}
+SEVERITY_COLORS = {"positive": "#10b981", "negative": "#ef4444", "neutral": "#3b82f6"}
+
+
+class PdfUnavailableError(RuntimeError):
+    """PDF export can't run right now (renderer missing or its pool crashed)."""
+
+
+def report_pdf_payload(report: WeeklyReport) -> Dict:
+    """Plain (picklable) fields of a stored report for the render worker."""
+    return {
+        "week_start": report.week_start.isoformat(),
+        "week_end": report.week_end.isoformat(),
+        "report_title": report.report_title or "Weekly Health Report",
+        "condition_summary": report.condition_summary or "",
+        "key_insights": report.key_insights or [],
+        "recommendations": report.recommendations or [],
+        "metrics_interpretation": report.metrics_interpretation or "",
+        "next_steps": report.next_steps or "",
+        "metrics": report.metrics or {},
+    }
+
+
+def render_report_pdf(payload: Dict) -> bytes:
+    """
+    Lay out one weekly report as an A4 PDF. Pure CPU work on plain data,
+    meant to run in a worker process (see ReportPdfService).
+    """
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    except ImportError:
+        raise PdfUnavailableError("reportlab is not installed; install it to export PDFs")
+
+    import io
+
+    styles = getSampleStyleSheet()
+    title = ParagraphStyle("ReportTitle", parent=styles["Title"], textColor=colors.HexColor("#667eea"))
+    heading = ParagraphStyle("Section", parent=styles["Heading2"], textColor=colors.HexColor("#667eea"))
+    body = styles["BodyText"]
+    muted = ParagraphStyle("Muted", parent=body, textColor=colors.HexColor("#666666"), fontSize=9)
+
+    def text(value) -> str:
+        # Paragraph takes mini-markup: escape LLM text
+        return escape(str(value or ""))
+
+    story = [
+        Paragraph(text(payload["report_title"]), title),
+        Paragraph(f"{payload['week_start']} to {payload['week_end']}", muted),
+        Spacer(1, 6 * mm),
+        Paragraph("Summary", heading),
+        Paragraph(text(payload["condition_summary"]), body),
+        Paragraph("Key Insights", heading),
+    ]
+
+    for insight in payload["key_insights"]:
+        color = SEVERITY_COLORS.get(insight.get("severity"), SEVERITY_COLORS["neutral"])
+        story.append(Paragraph(f'<font color="{color}"><b>{text(insight.get("title"))}</b></font>', body))
+        story.append(Paragraph(text(insight.get("description")), body))
+        story.append(Spacer(1, 2 * mm))
+
+    story.append(Paragraph("Recommendations", heading))
+    for rec in payload["recommendations"]:
+        priority = str(rec.get("priority") or "medium").lower()
+        color = PRIORITY_COLORS.get(priority, PRIORITY_COLORS["medium"])
+        story.append(Paragraph(
+            f'<b>{text(rec.get("action"))}</b> <font color="{color}">[{text(priority.upper())}]</font>',
+            body,
+        ))
+        story.append(Paragraph(text(rec.get("reasoning")), muted))
+        story.append(Spacer(1, 2 * mm))
+
+    metrics = payload["metrics"]
+    story += [
+        Paragraph("This Week's Metrics", heading),
+        Paragraph(text(payload["metrics_interpretation"]), body),
+        Spacer(1, 3 * mm),
+    ]
+    table = Table(
+        [
+            ["Images Uploaded", "Avg Confidence", "Change vs Last Week"],
+            [
+                str(metrics.get("total_images_uploaded", 0)),
+                f"{(metrics.get('average_confidence') or 0.0):.0%}",
+                f"{(metrics.get('improvement_vs_last_week') or 0.0):+.1f}%",
+            ],
+        ],
+        colWidths=[55 * mm] * 3,
+    )
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f8fafc")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#64748b")),
+        ("FONTSIZE", (0, 1), (-1, 1), 16),
+        ("TEXTCOLOR", (0, 1), (-1, 1), colors.HexColor("#667eea")),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("TOPPADDING", (0, 1), (-1, 1), 8),
+        ("BOTTOMPADDING", (0, 1), (-1, 1), 8),
+    ]))
+    story += [
+        table,
+        Paragraph("Next Steps", heading),
+        Paragraph(text(payload["next_steps"]), body),
+    ]
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        title=str(payload["report_title"]),
+        leftMargin=18 * mm,
+        rightMargin=18 * mm,
+        topMargin=18 * mm,
+        bottomMargin=18 * mm,
+    ).build(story)
+    return buffer.getvalue()
+
+
+class ReportPdfService:
+    """
+    Renders weekly report PDFs in a process pool (layout never runs on the
+    API event loop or its threads), stores them through StorageService and
+    records the URL on WeeklyReport.report_pdf_url. A file is named after
+    the report id and version, so it is reused until the report is
+    regenerated.
+    """
+
+    def __init__(self, storage: StorageService, workers: int = 2):
+        self.storage = storage
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._flight = SingleFlight()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: don't fork the API process (model threads, DB connections)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),
+            )
+        return self._pool
+
+    @staticmethod
+    def filename(report: WeeklyReport) -> str:
+        version = int(report.created_at.timestamp() * 1000)
+        return f"weekly_report_{report.id}_{version}.pdf"
+
+    def cached_path(self, report: WeeklyReport) -> Optional[str]:
+        """Filesystem path of the current PDF, if it was already rendered."""
+        if not report.report_pdf_url or not report.report_pdf_url.endswith(self.filename(report)):
+            return None
+        path = self.storage.get_full_path(report.report_pdf_url)
+        return path if os.path.exists(path) else None
+
+    async def render(self, report: WeeklyReport) -> bytes:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            return await loop.run_in_executor(pool, render_report_pdf, report_pdf_payload(report))
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault): drop the pool so the next call builds a new one
+            print("PDF render pool broke, restarting it")
+            if self._pool is pool:
+                self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise PdfUnavailableError("PDF renderer restarted, please retry")
+
+    async def get_or_render(self, db: AsyncSession, report: WeeklyReport) -> str:
+        """Path of the report's PDF, rendering and storing it on first request."""
+        path = self.cached_path(report)
+        if path:
+            return path
+
+        filename = self.filename(report)
+        url_path = await self._flight.do(filename, lambda: self._render_and_store(report, filename))
+
+        previous = report.report_pdf_url
+        if previous != url_path:
+            report.report_pdf_url = url_path
+            await db.commit()
+            if previous:
+                # PDF of an older version of this report
+                self.storage.delete_image(previous)
+
+        return self.storage.get_full_path(url_path)
+
+    async def _render_and_store(self, report: WeeklyReport, filename: str) -> str:
+        pdf = await self.render(report)
+        return await self.storage.save_bytes(pdf, filename)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
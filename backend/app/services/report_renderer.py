@@ -0,0 +1,89 @@
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from app.entities.weekly_report import WeeklyReport
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(APP_DIR, "templates")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+REPORT_CSS = "reports/report.css"
+
+
+class ReportRenderer:
+    """
+    Weekly report HTML from a Jinja2 template that is parsed and compiled
+    once per process.
+
+    The frontend injects the HTML into its own page, so a relative
+    stylesheet link would resolve against the frontend origin. The CSS is
+    therefore inlined unless `assets_base_url` is an absolute http(s) URL
+    of this API; then it is linked from /static with a content-hash query
+    so clients cache it until it changes.
+    """
+
+    def __init__(self, assets_base_url: str = ""):
+        self.env = Environment(
+            loader=FileSystemLoader(TEMPLATES_DIR),
+            autoescape=select_autoescape(["html"]),
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.template = self.env.get_template("reports/weekly_report.html")
+
+        with open(os.path.join(STATIC_DIR, REPORT_CSS), "rb") as f:
+            css = f.read()
+        self.inline_css = css.decode("utf-8")
+
+        self.css_url = None
+        if assets_base_url.startswith(("http://", "https://")):
+            version = hashlib.sha256(css).hexdigest()[:12]
+            self.css_url = f"{assets_base_url.rstrip('/')}/static/{REPORT_CSS}?v={version}"
+        elif assets_base_url:
+            print(f"REPORT_ASSETS_BASE_URL must be an absolute URL, inlining report CSS: {assets_base_url}")
+
+    def render(
+        self,
+        *,
+        week_start,
+        week_end,
+        report_title: Optional[str],
+        condition_summary: Optional[str],
+        key_insights: Optional[List[Dict]],
+        recommendations: Optional[List[Dict]],
+        metrics_interpretation: Optional[str],
+        next_steps: Optional[str],
+        metrics: Optional[Dict],
+    ) -> str:
+        metrics = metrics or {}
+        return self.template.render(
+            css_url=self.css_url,
+            inline_css=self.inline_css,
+            week_start=week_start,
+            week_end=week_end,
+            report_title=report_title or "Weekly Health Report",
+            condition_summary=condition_summary,
+            key_insights=key_insights or [],
+            recommendations=recommendations or [],
+            metrics_interpretation=metrics_interpretation,
+            next_steps=next_steps,
+            total_images=metrics.get("total_images_uploaded", 0),
+            average_confidence=metrics.get("average_confidence") or 0.0,
+            improvement=metrics.get("improvement_vs_last_week") or 0.0,
+        )
+
+    def render_report(self, report: WeeklyReport) -> str:
+        """Render a stored report from its JSON fields (no stored HTML needed)."""
+        return self.render(
+            week_start=report.week_start.isoformat(),
+            week_end=report.week_end.isoformat(),
+            report_title=report.report_title,
+            condition_summary=report.condition_summary,
+            key_insights=report.key_insights,
+            recommendations=report.recommendations,
+            metrics_interpretation=report.metrics_interpretation,
+            next_steps=report.next_steps,
+            metrics=report.metrics,
+        )
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, select
+
+from app.core.database import AsyncSessionLocal
+from app.entities.skin_diagnosis import SkinDiagnosis
+from app.entities.skin_image import SkinImage
+from app.entities.weekly_report import WeeklyReport
+from app.utils.concurrency import bounded_gather
+from app.utils.singleflight import try_advisory_session_lock
+
+SWEEP_LOCK = "weekly-report-pregeneration"
+
+
+def last_closed_week(today: Optional[date] = None) -> date:
+    """Monday of the most recent fully elapsed Monday–Sunday week."""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday() + 7)
+
+
+class WeeklyReportScheduler:
+    """
+    Pre-generates weekly reports once a week has closed, so the first view
+    reads a stored report instead of waiting on the LLM.
+
+    Every sweep looks up users with something to report on (diagnosed skin
+    images, the same data gather_weekly_context needs) in the last
+    `lookback_weeks` closed weeks that have no finished report yet and
+    generates them `concurrency` at a time. All state lives in the
+    database, so every worker and restart sees the same pending set; only
+    one worker sweeps at a time (session-level advisory lock, no
+    transaction held across the LLM calls).
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[UUID, date], Awaitable[bool]],
+        is_available: Callable[[], bool],
+        concurrency: int = 2,
+        interval_s: float = 3600,
+        lookback_weeks: int = 1,
+    ):
+        self.generate = generate
+        self.is_available = is_available
+        self.concurrency = concurrency
+        self.interval_s = interval_s
+        self.lookback_weeks = lookback_weeks
+
+    async def run_forever(self):
+        while True:
+            try:
+                summary = await self.run_once()
+                if summary.get("generated") or summary.get("failed"):
+                    print(f"Weekly report pre-generation: {summary}")
+            except Exception as e:
+                print(f"Weekly report pre-generation failed: {e}")
+            await asyncio.sleep(self.interval_s)
+
+    async def run_once(self, today: Optional[date] = None) -> Dict:
+        newest = last_closed_week(today)
+        weeks = [newest - timedelta(weeks=i) for i in range(self.lookback_weeks)]
+        summary = {"weeks": [w.isoformat() for w in weeks], "generated": 0, "failed": 0, "no_data": 0}
+
+        if not self.is_available():
+            summary["skipped"] = "report generation unavailable"
+            return summary
+
+        # Held for the whole sweep; other workers skip this round
+        async with try_advisory_session_lock(SWEEP_LOCK) as acquired:
+            if not acquired:
+                summary["skipped"] = "another worker is sweeping"
+                return summary
+
+            jobs = []
+            async with AsyncSessionLocal() as db:
+                for week_start in weeks:
+                    for user_id in await self._pending_users(db, week_start):
+                        jobs.append((user_id, week_start))
+
+            # Each generation uses short sessions of its own
+            outcomes = await bounded_gather(
+                [lambda job=job: self._generate(*job) for job in jobs],
+                self.concurrency,
+            )
+
+        for job, outcome in zip(jobs, outcomes):
+            if outcome["error"]:
+                summary["failed"] += 1
+                print(f"Pre-generating report {job} failed: {outcome['error']}")
+            elif outcome["result"] == "no_data":
+                summary["no_data"] += 1
+            else:
+                summary["generated"] += 1
+        return summary
+
+    async def _generate(self, user_id: UUID, week_start: date) -> str:
+        # Stop early rather than queue more calls behind an open breaker
+        if not self.is_available():
+            raise RuntimeError("report generation unavailable")
+        try:
+            await self.generate(user_id, week_start)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise RuntimeError(e.detail)
+            return "no_data"
+        return "generated"
+
+    @staticmethod
+    async def _pending_users(db, week_start: date) -> List[UUID]:
+        start = datetime.combine(week_start, datetime.min.time())
+        end = datetime.combine(week_start + timedelta(days=6), datetime.max.time())
+
+        # Mood-only weeks have nothing to report on (no report would be stored)
+        active = (
+            select(SkinImage.user_id)
+            .join(SkinDiagnosis, SkinImage.id == SkinDiagnosis.skin_image_id)
+            .where(SkinImage.captured_at.between(start, end))
+            .distinct()
+            .subquery()
+        )
+
+        has_report = exists().where(
+            and_(
+                WeeklyReport.user_id == active.c.user_id,
+                WeeklyReport.week_start == week_start,
+                WeeklyReport.condition_summary.isnot(None),
+            )
+        )
+
+        result = await db.execute(select(active.c.user_id).where(~has_report))
+        return list(result.scalars().all())
@@ -32,6 +32,18 @@ class StorageService:
         print(f"🔍 DEBUG - Saving image with URL path: {url_path}")  # Debug log
         return url_path
     
+    async def save_bytes(self, data: bytes, filename: str) -> str:
+        """Save generated content (e.g. a report PDF) and return its URL path."""
+        file_path = self.base_path / filename
+        
+        # Write to a temp name first so readers never see a partial file
+        tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+        async with aiofiles.open(tmp_path, "wb") as f:
+            await f.write(data)
+        os.replace(tmp_path, file_path)
+        
+        return f"/{str(file_path).replace(os.sep, '/')}"
+    
     def delete_image(self, file_path: str) -> bool:
         """Delete an image file."""
         try:
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import AsyncSessionLocal
+from app.entities.vision_response_cache import VisionResponseCache
+
+
+def file_content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VisionCache:
+    """
+    Persistent cache of Azure Vision responses keyed by image content
+    hash(es), prompt version and deployment, with a TTL.
+
+    Uses its own short-lived DB sessions so it works from request handlers
+    and background jobs alike. Any cache failure is logged and treated as a
+    miss — it must never break a vision call.
+    """
+
+    def __init__(
+        self,
+        deployment: str,
+        ttl_hours: float,
+        enabled: bool = True,
+        max_file_hashes: int = 4096,
+    ):
+        self.deployment = deployment
+        self.ttl = timedelta(hours=ttl_hours)
+        self.enabled = enabled
+        self.max_file_hashes = max_file_hashes
+
+        # LRU of path -> (mtime_ns, size, hash): avoid re-hashing unchanged files
+        self._hashes: "OrderedDict[str, tuple]" = OrderedDict()
+        # hash_files runs _hash_file on worker threads
+        self._hashes_lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def _hash_file(self, path: str) -> str:
+        stat = os.stat(path)
+        with self._hashes_lock:
+            cached = self._hashes.get(path)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._hashes.move_to_end(path)
+                return cached[2]
+
+        # Read + hash outside the lock so other files hash in parallel
+        content_hash = file_content_hash(path)
+
+        with self._hashes_lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+            self._hashes.move_to_end(path)
+            while len(self._hashes) > self.max_file_hashes:
+                self._hashes.popitem(last=False)
+        return content_hash
+
+    async def hash_files(self, paths: List[str]) -> List[str]:
+        """Content hashes of `paths`; [] when the cache is disabled (nothing to key)."""
+        if not self.enabled:
+            return []
+        return list(await asyncio.gather(
+            *(asyncio.to_thread(self._hash_file, path) for path in paths)
+        ))
+
+    def _key(self, kind: str, hashes: List[str], prompt_version: str) -> str:
+        raw = "|".join([kind, *hashes, prompt_version, self.deployment])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, kind: str, hashes: List[str], prompt_version: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(VisionResponseCache.response).where(
+                        VisionResponseCache.cache_key == self._key(kind, hashes, prompt_version),
+                        VisionResponseCache.expires_at > datetime.now(timezone.utc),
+                    )
+                )
+                response = result.scalar_one_or_none()
+        except Exception as e:
+            print(f"Vision cache lookup failed: {e}")
+            response = None
+
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    async def set(self, kind: str, hashes: List[str], prompt_version: str, response: Dict):
+        if not self.enabled:
+            return
+
+        now = datetime.now(timezone.utc)
+        values = {
+            "cache_key": self._key(kind, hashes, prompt_version),
+            "kind": kind,
+            "image_hash": hashes[0],
+            "other_image_hash": hashes[1] if len(hashes) > 1 else None,
+            "prompt_version": prompt_version,
+            "deployment": self.deployment,
+            "response": response,
+            "expires_at": now + self.ttl,
+        }
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    insert(VisionResponseCache)
+                    .values(**values)
+                    .on_conflict_do_update(
+                        index_elements=["cache_key"],
+                        set_={
+                            "response": values["response"],
+                            "expires_at": values["expires_at"],
+                        },
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            print(f"Vision cache write failed: {e}")
+
+    async def invalidate_image(self, image_hash: str):
+        """Drop every cached analysis / comparison involving this image."""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    delete(VisionResponseCache).where(
+                        or_(
+                            VisionResponseCache.image_hash == image_hash,
+                            VisionResponseCache.other_image_hash == image_hash,
+                        )
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            print(f"Vision cache invalidation failed: {e}")
+
+    async def purge_expired(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(VisionResponseCache).where(
+                    VisionResponseCache.expires_at <= datetime.now(timezone.utc)
+                )
+            )
+            await db.commit()
+        return result.rowcount or 0
+
+    async def run_purge_forever(self, interval_s: float):
+        """Background loop: delete expired rows every `interval_s`."""
+        while True:
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    print(f"Purged {purged} expired vision cache entries")
+            except Exception as e:
+                print(f"Vision cache purge failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
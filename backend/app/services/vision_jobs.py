@@ -0,0 +1,157 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.entities.skin_image import SkinImage
+from app.entities.skin_vision_analysis import SkinVisionAnalysis
+from app.services.azure_vision import AzureVisionService
+
+ANALYSIS_FIELDS = (
+    "condition",
+    "severity",
+    "severity_score",
+    "affected_area_percentage",
+    "redness_level",
+    "texture_roughness",
+    "description",
+)
+
+
+class VisionAnalysisJobs:
+    """
+    Runs Azure Vision analysis of uploaded images after the upload response
+    has been sent and persists the full result per SkinImage.
+
+    Jobs run as in-process background tasks, so a restart loses them; the
+    startup sweep (recover_stale) re-runs or fails rows left pending/running.
+    """
+
+    def __init__(self, vision_service: AzureVisionService):
+        self.vision_service = vision_service
+
+    async def get(self, db: AsyncSession, skin_image_id: UUID) -> Optional[SkinVisionAnalysis]:
+        result = await db.execute(
+            select(SkinVisionAnalysis).where(SkinVisionAnalysis.skin_image_id == skin_image_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def enqueue(self, db: AsyncSession, skin_image_id: UUID) -> SkinVisionAnalysis:
+        """Create (or reset) the pending analysis row; caller commits."""
+        analysis = await self.get(db, skin_image_id)
+        if analysis is None:
+            analysis = SkinVisionAnalysis(skin_image_id=skin_image_id)
+            db.add(analysis)
+
+        analysis.status = "pending"
+        analysis.error = None
+        analysis.completed_at = None
+        await db.flush()
+        return analysis
+
+    @staticmethod
+    def store_result(analysis: SkinVisionAnalysis, result: Dict):
+        for field in ANALYSIS_FIELDS:
+            setattr(analysis, field, result.get(field))
+        analysis.status = "completed"
+        analysis.error = None
+        analysis.completed_at = datetime.now(timezone.utc)
+
+    async def run(self, skin_image_id: UUID, file_path: str):
+        """Background task: analyze `file_path` and persist the result (own DB session)."""
+        async with AsyncSessionLocal() as db:
+            analysis = await self.get(db, skin_image_id)
+            if analysis is None:
+                return
+
+            analysis.status = "running"
+            await db.commit()
+
+            try:
+                result = await self.vision_service.analyze_single_image(file_path)
+                self.store_result(analysis, result)
+            except asyncio.CancelledError:
+                # Shutdown / client gone: don't leave the row "running" forever
+                await asyncio.shield(self._mark_failed(skin_image_id, "Analysis was cancelled"))
+                raise
+            except Exception as e:
+                print(f"Vision analysis failed for {skin_image_id}: {e}")
+                analysis.status = "failed"
+                analysis.error = str(e)
+                analysis.completed_at = datetime.now(timezone.utc)
+
+            await db.commit()
+
+    @staticmethod
+    async def _mark_failed(skin_image_id: UUID, error: str):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(SkinVisionAnalysis)
+                .where(SkinVisionAnalysis.skin_image_id == skin_image_id)
+                .values(status="failed", error=error, completed_at=datetime.now(timezone.utc))
+            )
+            await db.commit()
+
+    async def recover_stale(
+        self,
+        to_path: Callable[[str], str],
+        stale_after_s: float = 900,
+        max_age_s: float = 24 * 3600,
+    ) -> Dict:
+        """
+        Startup sweep for jobs lost with a previous process. Rows pending or
+        running with no update for `stale_after_s` are re-run (one at a
+        time) if updated within `max_age_s` and Azure Vision is available,
+        otherwise marked failed. Rows are claimed with a conditional UPDATE,
+        so workers starting together don't run the same job twice.
+        """
+        now = datetime.now(timezone.utc)
+        stale = and_(
+            SkinVisionAnalysis.status.in_(("pending", "running")),
+            SkinVisionAnalysis.updated_at < now - timedelta(seconds=stale_after_s),
+        )
+        too_old = SkinVisionAnalysis.updated_at < now - timedelta(seconds=max_age_s)
+        if not self.vision_service.is_available():
+            too_old = true()
+
+        async with AsyncSessionLocal() as db:
+            failed = await db.execute(
+                update(SkinVisionAnalysis)
+                .where(stale, too_old)
+                .values(status="failed", error="Analysis was interrupted", completed_at=now)
+            )
+            claimed = await db.execute(
+                update(SkinVisionAnalysis)
+                .where(stale)
+                .values(status="pending", updated_at=now)
+                .returning(SkinVisionAnalysis.skin_image_id)
+            )
+            image_ids = list(claimed.scalars().all())
+
+            paths = {}
+            if image_ids:
+                result = await db.execute(
+                    select(SkinImage.id, SkinImage.image_url).where(SkinImage.id.in_(image_ids))
+                )
+                paths = {image_id: to_path(url) for image_id, url in result.all()}
+            await db.commit()
+
+        for image_id, path in paths.items():
+            await self.run(image_id, path)
+
+        return {"requeued": len(paths), "failed": failed.rowcount or 0}
+
+    @staticmethod
+    def to_dict(analysis: SkinVisionAnalysis) -> Dict:
+        data = {
+            "image_id": str(analysis.skin_image_id),
+            "status": analysis.status,
+            "error": analysis.error,
+            "completed_at": analysis.completed_at.isoformat() if analysis.completed_at else None,
+        }
+        data.update({field: getattr(analysis, field) for field in ANALYSIS_FIELDS})
+        return data
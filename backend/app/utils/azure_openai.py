@@ -0,0 +1,48 @@
+# ============================================================================
+# FILE: backend/app/utils/azure_openai.py
+# ============================================================================
+
+from typing import Optional
+
+import httpx
+from openai import AsyncAzureOpenAI
+
+from app.core.config import settings
+
+_client: Optional[AsyncAzureOpenAI] = None
+
+
+def get_async_client() -> AsyncAzureOpenAI:
+    """
+    Process-wide async Azure OpenAI client over one pooled HTTP/1.1
+    connection pool (keep-alive reused across requests).
+    """
+    global _client
+
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.AZURE_OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AZURE_OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=30,
+            ),
+            timeout=httpx.Timeout(settings.AZURE_OPENAI_TIMEOUT_S, connect=5.0),
+        )
+
+        _client = AsyncAzureOpenAI(
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            http_client=http_client,
+            max_retries=settings.AZURE_OPENAI_MAX_RETRIES,
+        )
+
+    return _client
+
+
+async def close_async_client():
+    global _client
+
+    if _client is not None:
+        await _client.close()
+        _client = None
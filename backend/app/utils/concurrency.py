@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+async def bounded_as_completed(
+    calls: Sequence[Callable[[], Awaitable[Any]]],
+    concurrency: int,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Run `calls` (zero-arg coroutine factories) with at most `concurrency`
+    in flight, each bounded by `timeout` seconds.
+
+    Yields {"index", "result", "error"} in completion order; a failed or
+    timed-out call yields result=None and an error string instead of
+    raising. Pending calls are cancelled if the consumer stops early.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, call: Callable[[], Awaitable[Any]]) -> Dict:
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(call(), timeout)
+            except asyncio.TimeoutError:
+                return {"index": index, "result": None, "error": f"Timed out after {timeout}s"}
+            except Exception as e:
+                return {"index": index, "result": None, "error": str(e) or type(e).__name__}
+        return {"index": index, "result": result, "error": None}
+
+    tasks = [asyncio.ensure_future(run(i, call)) for i, call in enumerate(calls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def bounded_gather(
+    calls: Sequence[Callable[[], Awaitable[Any]]],
+    concurrency: int,
+    timeout: Optional[float] = None,
+) -> List[Dict]:
+    """Same as bounded_as_completed, but returns the outcomes in input order."""
+    outcomes: List[Optional[Dict]] = [None] * len(calls)
+    async for outcome in bounded_as_completed(calls, concurrency, timeout):
+        outcomes[outcome["index"]] = outcome
+    return outcomes
@@ -0,0 +1,119 @@
+import base64
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from PIL import Image, ImageOps
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def downscale_and_encode(
+    image_path: str,
+    max_long_side: int = 2048,
+    max_short_side: int = 768,
+    quality: int = 85,
+    image_format: str = "JPEG",
+) -> bytes:
+    """
+    Resize an image to the vision model's effective resolution and
+    re-encode it. EXIF orientation is applied first, then all metadata
+    (EXIF, GPS, ICC) is dropped by re-encoding from raw pixels.
+    """
+    with Image.open(image_path) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+        long_side, short_side = max(img.size), min(img.size)
+        scale = min(1.0, max_long_side / long_side, max_short_side / short_side)
+        if scale < 1.0:
+            new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(new_size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format=image_format, quality=quality, optimize=True)
+        return buffer.getvalue()
+
+
+class VisionImageEncoder:
+    """
+    Produces base64 payloads for vision requests (downscaled, EXIF-stripped,
+    re-encoded) and caches them per file in an LRU bounded by total bytes.
+    Cache keys include mtime/size so a replaced file is re-encoded.
+    """
+
+    def __init__(
+        self,
+        max_long_side: int = 2048,
+        max_short_side: int = 768,
+        quality: int = 85,
+        image_format: str = "JPEG",
+        cache_max_bytes: int = 64 * 1024 * 1024,
+    ):
+        image_format = image_format.upper()
+        if image_format not in MIME_TYPES:
+            raise ValueError(f"Unsupported vision image format '{image_format}'")
+
+        self.max_long_side = max_long_side
+        self.max_short_side = max_short_side
+        self.quality = quality
+        self.image_format = image_format
+        self.mime_type = MIME_TYPES[image_format]
+        self.cache_max_bytes = cache_max_bytes
+
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def encode(self, image_path: str) -> Tuple[str, str]:
+        """Return (base64 payload, mime type) for `image_path`."""
+        stat = os.stat(image_path)
+        key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key], self.mime_type
+
+        data = downscale_and_encode(
+            image_path,
+            max_long_side=self.max_long_side,
+            max_short_side=self.max_short_side,
+            quality=self.quality,
+            image_format=self.image_format,
+        )
+        payload = base64.b64encode(data).decode("utf-8")
+
+        with self._lock:
+            self.misses += 1
+            self.bytes_in += stat.st_size
+            self.bytes_out += len(payload)
+
+            if key not in self._cache:
+                self._cache[key] = payload
+                self._cache_bytes += len(payload)
+
+            while self._cache_bytes > self.cache_max_bytes and self._cache:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+        return payload, self.mime_type
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "cache_bytes": self._cache_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "original_bytes": self.bytes_in,
+                "payload_bytes": self.bytes_out,
+            }
@@ -0,0 +1,82 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class TopLevelJSONStream:
+    """
+    Incremental parser for a streamed JSON object: feed text chunks as they
+    arrive and get back each top-level (key, value) pair once its value is
+    complete. Text before the opening brace (e.g. a ```json fence) and after
+    the closing brace is ignored.
+
+        parser = TopLevelJSONStream()
+        parser.feed('{"title": "Wee')        # -> []
+        parser.feed('k 3", "items": [1')     # -> [("title", "Week 3")]
+        parser.feed(', 2]}')                 # -> [("items", [1, 2])]
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._buffer += chunk
+        pairs = []
+
+        while self._pos < len(self._buffer) and not self.complete:
+            char = self._buffer[self._pos]
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None:
+                        self._key = json.loads(self._buffer[self._key_start:self._pos + 1])
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._key is None:
+                        self._key_start = self._pos
+                    elif self._value_start is None:
+                        self._value_start = self._pos
+            elif char in "{[":
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    pairs.extend(self._finish_value())
+                    self.complete = True
+            elif char == ",":
+                if self._depth == 1:
+                    pairs.extend(self._finish_value())
+            elif char != ":" and not char.isspace():
+                # Start of a number / true / false / null
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = self._pos
+
+            self._pos += 1
+
+        return pairs
+
+    def _finish_value(self) -> List[Tuple[str, Any]]:
+        if self._key is None or self._value_start is None:
+            return []
+
+        pair = (self._key, json.loads(self._buffer[self._value_start:self._pos]))
+        self._key = self._key_start = self._value_start = None
+        return [pair]
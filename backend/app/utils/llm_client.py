@@ -8,6 +8,7 @@ from typing import Dict
 from openai import AsyncAzureOpenAI
 
 from app.core.config import settings
+from app.utils.llm_governor import estimate_chat_tokens, get_chat_governor
 
 
 class LLMClient:
@@ -21,31 +22,39 @@ class LLMClient:
             api_key=settings.AZURE_OPENAI_API_KEY,
             azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
             api_version=settings.AZURE_OPENAI_API_VERSION,
+            max_retries=0,  # Retries are handled by the governor
         )
 
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT
         self.temperature = 0.0
+        self.governor = get_chat_governor()
 
     async def generate_json(self, prompt: str) -> Dict:
         """
         Send a prompt to Azure OpenAI and return parsed JSON.
-        Raises ValueError if output is invalid JSON.
+        Raises ValueError if output is invalid JSON, CircuitOpenError if
+        Azure is currently failing fast.
         """
 
-        response = await self.client.chat.completions.create(
-            model=self.deployment,
-            temperature=self.temperature,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a system that returns ONLY valid JSON.",
-                },
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
-            response_format={"type": "json_object"},
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a system that returns ONLY valid JSON.",
+            },
+            {
+                "role": "user",
+                "content": prompt,
+            },
+        ]
+
+        response = await self.governor.call(
+            lambda: self.client.chat.completions.create(
+                model=self.deployment,
+                temperature=self.temperature,
+                messages=messages,
+                response_format={"type": "json_object"},
+            ),
+            estimated_tokens=estimate_chat_tokens(messages),
         )
 
         content = response.choices[0].message.content.strip()
@@ -0,0 +1,343 @@
+# ============================================================================
+# FILE: backend/app/utils/llm_governor.py
+# ============================================================================
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import openai
+
+from app.core.config import settings
+
+# Rough prompt-token cost of one downscaled image (768px short side, high detail)
+IMAGE_TOKENS = 800
+
+# Transient failures worth retrying (and counted by the circuit breaker)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Azure while a deployment's breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Azure deployment '{name}' is unavailable (retry in {retry_in:.0f}s)")
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, bursting up to one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 = now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+
+    def consume(self, amount: float):
+        # May go negative when reconciling with actual usage; refill catches up
+        self.tokens -= amount
+
+
+class OutboundGovernor:
+    """
+    Shared throttling for one Azure deployment:
+
+    - token buckets for requests/min and tokens/min (0 disables a limit),
+      so callers queue locally instead of collecting 429s;
+    - retries of transient errors with jittered exponential backoff,
+      honoring Retry-After (which also pauses every other caller);
+    - a circuit breaker: after `failure_threshold` consecutive failed calls
+      the deployment fails fast with CircuitOpenError for `reset_timeout_s`,
+      then a single probe call decides whether to close it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_retries: int = 3,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 30.0,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+
+        self._lock: Optional[asyncio.Lock] = None  # created on first use (event loop)
+        self._paused_until = 0.0
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+        self._counters = {
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "throttled": 0,
+            "retries": 0,
+            "local_waits": 0,
+            "local_wait_s": 0.0,
+            "breaker_trips": 0,
+            "short_circuited": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Circuit breaker
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout_s:
+            return "open"
+        return "half_open"
+
+    def is_open(self) -> bool:
+        """True while calls would fail fast (callers should use local fallbacks)."""
+        state = self.state
+        return state == "open" or (state == "half_open" and self._probe_in_flight)
+
+    def _before_call(self) -> bool:
+        """Raise if the breaker rejects the call; True if this call is the probe."""
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self._counters["short_circuited"] += 1
+        retry_in = max(0.0, self.reset_timeout_s - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_in)
+
+    def _record_success(self):
+        self._counters["succeeded"] += 1
+        self._consecutive_failures = 0
+        self._opened_at = None
+
+    def _record_failure(self, probe: bool):
+        self._counters["failed"] += 1
+        self._consecutive_failures += 1
+        if probe or self._consecutive_failures >= self.failure_threshold:
+            if self._opened_at is None or probe:
+                self._counters["breaker_trips"] += 1
+                print(f"⚠️ Circuit breaker opened for Azure deployment '{self.name}'")
+            self._opened_at = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Rate limiting
+    # ------------------------------------------------------------------
+
+    async def _acquire(self, estimated_tokens: int):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # One waiter at a time keeps the queue FIFO
+        async with self._lock:
+            waited = 0.0
+            while True:
+                delay = max(
+                    self._paused_until - time.monotonic(),
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(estimated_tokens) if self.tokens else 0.0,
+                )
+                if delay <= 0:
+                    break
+                waited += delay
+                await asyncio.sleep(delay)
+
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(min(estimated_tokens, self.tokens.capacity))
+
+        if waited:
+            self._counters["local_waits"] += 1
+            self._counters["local_wait_s"] += waited
+
+    def _reconcile_tokens(self, result: Any, estimated_tokens: int):
+        usage = getattr(result, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if self.tokens and total is not None:
+            self.tokens.consume(total - min(estimated_tokens, self.tokens.capacity))
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            pass  # HTTP-date form: fall back to our own backoff
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from concurrent callers apart
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], estimated_tokens: int = 0) -> Any:
+        """
+        Run `fn` (zero-arg coroutine factory making one Azure request)
+        under the deployment's limits. Non-transient errors (bad request,
+        auth, content filter) are raised immediately and don't count
+        towards the breaker.
+        """
+        probe = self._before_call()
+        self._counters["requests"] += 1
+        try:
+            return await self._call_with_retries(fn, estimated_tokens, probe)
+        finally:
+            # Also on cancellation (client gone, timeout): a cancelled probe
+            # counts as neither success nor failure, the next call probes again
+            if probe:
+                self._probe_in_flight = False
+
+    async def _call_with_retries(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        probe: bool,
+    ) -> Any:
+        attempt = 0
+        while True:
+            await self._acquire(estimated_tokens)
+            try:
+                result = await fn()
+            except RETRYABLE_ERRORS as e:
+                retry_after = None
+                if isinstance(e, openai.RateLimitError):
+                    self._counters["throttled"] += 1
+                    retry_after = self._retry_after(e)
+
+                give_up = (
+                    attempt >= self.max_retries
+                    or probe
+                    or (retry_after is not None and retry_after > self.backoff_max_s)
+                )
+                if give_up:
+                    self._record_failure(probe)
+                    raise
+
+                if retry_after is not None:
+                    delay = retry_after + random.uniform(0, self.backoff_base_s)
+                    # Azure is throttling the deployment, not just this request
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                else:
+                    delay = self._backoff(attempt)
+
+                attempt += 1
+                self._counters["retries"] += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self._record_success()
+            self._reconcile_tokens(result, estimated_tokens)
+            return result
+
+    def stats(self) -> Dict:
+        return {
+            **self._counters,
+            "local_wait_s": round(self._counters["local_wait_s"], 3),
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "requests_available": round(self.requests.tokens, 1) if self.requests else None,
+            "tokens_available": round(self.tokens.tokens) if self.tokens else None,
+        }
+
+
+_GOVERNORS: Dict[str, OutboundGovernor] = {}
+
+
+def get_governor(
+    name: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> OutboundGovernor:
+    """Process-wide governor for a deployment (limits default to the LLM_* settings)."""
+    if name not in _GOVERNORS:
+        _GOVERNORS[name] = OutboundGovernor(
+            name,
+            requests_per_minute=(
+                settings.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+            ),
+            tokens_per_minute=(
+                settings.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+            ),
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base_s=settings.LLM_BACKOFF_BASE_S,
+            backoff_max_s=settings.LLM_BACKOFF_MAX_S,
+            failure_threshold=settings.LLM_BREAKER_FAILURES,
+            reset_timeout_s=settings.LLM_BREAKER_RESET_S,
+        )
+    return _GOVERNORS[name]
+
+
+def get_chat_governor() -> OutboundGovernor:
+    """Governor for the chat/vision deployment (AZURE_OPENAI_DEPLOYMENT)."""
+    return get_governor(settings.AZURE_OPENAI_DEPLOYMENT)
+
+
+def get_whisper_governor() -> OutboundGovernor:
+    return get_governor(
+        "whisper",
+        requests_per_minute=settings.WHISPER_REQUESTS_PER_MINUTE,
+        tokens_per_minute=0,
+    )
+
+
+def estimate_chat_tokens(messages: List[Dict], max_tokens: Optional[int] = None) -> int:
+    """Prompt (~4 chars per token, fixed cost per image) plus the completion budget."""
+    chars, images = 0, 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "image_url":
+                images += 1
+            else:
+                chars += len(part.get("text", ""))
+    return chars // 4 + images * IMAGE_TOKENS + (max_tokens or 1000)
+
+
+def governor_stats() -> Dict[str, Dict]:
+    return {name: governor.stats() for name, governor in _GOVERNORS.items()}
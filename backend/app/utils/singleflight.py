@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import engine
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: concurrent `do(key, fn)` calls with the
+    same key share one run of `fn`. The run is its own task, so a caller
+    that disconnects doesn't cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._counters = {"runs": 0, "joined": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self._counters["runs"] += 1
+        else:
+            self._counters["joined"] += 1
+
+        return await asyncio.shield(task)
+
+    def running(self, key: Hashable) -> Optional[asyncio.Task]:
+        """The in-flight run for `key`, if any (await it through asyncio.shield)."""
+        return self._calls.get(key)
+
+    def stats(self) -> Dict:
+        return {**self._counters, "in_flight": len(self._calls)}
+
+
+Emit = Callable[[Any], None]
+
+
+class _StreamRun:
+    __slots__ = ("events", "queues", "task")
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.queues: List[asyncio.Queue] = []
+        self.task: Optional[asyncio.Task] = None
+
+
+class StreamFlight:
+    """
+    SingleFlight for streamed results: concurrent `subscribe(key, produce)`
+    calls share one run of `produce(emit)`. A subscriber that joins late
+    first gets every event emitted so far, then follows the live ones. The
+    run is its own task, so it finishes even if every subscriber leaves.
+    """
+
+    def __init__(self):
+        self._runs: Dict[Hashable, _StreamRun] = {}
+        self._counters = {"runs": 0, "joined": 0}
+
+    def subscribe(self, key: Hashable, produce: Callable[[Emit], Awaitable[None]]) -> AsyncIterator[Any]:
+        run = self._runs.get(key)
+        if run is None:
+            run = _StreamRun()
+            self._runs[key] = run
+            run.task = asyncio.ensure_future(self._run(key, run, produce))
+            self._counters["runs"] += 1
+        else:
+            self._counters["joined"] += 1
+
+        # Registered before returning, so no event can fall between the
+        # replay and the live ones
+        queue = asyncio.Queue()
+        for event in run.events:
+            queue.put_nowait(event)
+        run.queues.append(queue)
+        return self._follow(run, queue)
+
+    async def _run(self, key: Hashable, run: _StreamRun, produce: Callable[[Emit], Awaitable[None]]):
+        def emit(event: Any):
+            run.events.append(event)
+            for queue in run.queues:
+                queue.put_nowait(event)
+
+        try:
+            await produce(emit)
+        except Exception as e:
+            # Producers report failures as events; this is a bug in one
+            print(f"Stream producer for {key} failed: {e}")
+        finally:
+            self._runs.pop(key, None)
+            for queue in run.queues:
+                queue.put_nowait(None)
+
+    @staticmethod
+    async def _follow(run: _StreamRun, queue: asyncio.Queue) -> AsyncIterator[Any]:
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            run.queues.remove(queue)
+
+    def stats(self) -> Dict:
+        return {**self._counters, "in_flight": len(self._runs)}
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_*lock (same in every worker)."""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+async def advisory_xact_lock(db: AsyncSession, name: str):
+    """
+    Block until this transaction holds the cross-worker lock for `name`;
+    released automatically on commit / rollback.
+    """
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"),
+        {"key": advisory_lock_key(name)},
+    )
+
+
+@asynccontextmanager
+async def try_advisory_session_lock(name: str) -> AsyncIterator[bool]:
+    """
+    Non-blocking session-level lock for long jobs: yields False if another
+    worker holds it, else holds it until the block exits. Uses a dedicated
+    pooled connection whose transaction is committed right away, so it
+    isn't left idle in a transaction while the job runs.
+    """
+    key = advisory_lock_key(name)
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+        acquired = bool(result.scalar())
+        await conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    await conn.commit()
+                except BaseException:
+                    # Session locks survive pool check-in: never reuse this connection
+                    await conn.invalidate()
+                    raise
@@ -1,10 +1,12 @@
 from openai import AsyncAzureOpenAI
 from app.core.config import settings
+from app.utils.llm_governor import get_whisper_governor
 
 client = AsyncAzureOpenAI(
     api_key=settings.AZURE_WHISPER_KEY,
     azure_endpoint=settings.AZURE_WHISPER_URI,
     api_version=settings.AZURE_OPENAI_API_VERSION,
+    max_retries=0,  # Retries are handled by the governor
 )
 
 
@@ -13,11 +15,15 @@ async def transcribe_audio(audio_path: str) -> str:
     Batch transcription using Azure OpenAI Whisper.
     """
 
-    with open(audio_path, "rb") as audio_file:
-        response = await client.audio.transcriptions.create(
-            file=audio_file,
-            model="whisper",
-            response_format="text",
-        )
+    async def transcribe():
+        # Reopen per attempt: a retried upload must start from byte 0
+        with open(audio_path, "rb") as audio_file:
+            return await client.audio.transcriptions.create(
+                file=audio_file,
+                model="whisper",
+                response_format="text",
+            )
+
+    response = await get_whisper_governor().call(transcribe)
 
     return response.strip()
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Micro-batching benchmark for the DINOv2 skin classifier.
+
+Fires concurrent single-image requests through MicroBatcher and reports
+throughput and latency percentiles for each max batch size.
+
+Usage (from backend/):
+    python -m benchmarks.batching --requests 64 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import torch
+
+from app.models.batching import MicroBatcher
+from app.models.model import SkinClassifier, WEIGHTS_PATH
+
+
+def build_model() -> SkinClassifier:
+    model = SkinClassifier()
+    if os.path.exists(WEIGHTS_PATH):
+        model.load_state_dict(torch.load(WEIGHTS_PATH, map_location="cpu"))
+    else:
+        print(f"⚠️  {WEIGHTS_PATH} not found, benchmarking random weights")
+    model.eval()
+    return model
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_case(model, batch_size, args):
+    def forward(tensors):
+        with torch.inference_mode():
+            logits = model(torch.stack(tensors))
+        return logits.argmax(dim=1).tolist()
+
+    batcher = MicroBatcher(
+        forward,
+        max_batch_size=batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+    sample = torch.randn(3, args.resolution, args.resolution)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            await batcher.submit(sample)
+            latencies.append(time.perf_counter() - start)
+
+    # Warm-up so allocator / thread pools don't skew the first case
+    await asyncio.gather(*(batcher.submit(sample) for _ in range(batch_size)))
+    batcher.batches_run = batcher.items_processed = 0
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    stats = batcher.stats()
+    await batcher.close()
+
+    return {
+        "batch_size": batch_size,
+        "throughput": args.requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "avg_batch": stats["average_batch_size"],
+    }
+
+
+async def main(args):
+    torch.set_num_threads(args.threads or torch.get_num_threads())
+    model = build_model()
+
+    print(
+        f"requests={args.requests} concurrency={args.concurrency} "
+        f"resolution={args.resolution} threads={torch.get_num_threads()}"
+    )
+    print(f"{'batch':>5} {'img/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'avg batch':>9}")
+
+    for batch_size in args.batch_sizes:
+        r = await run_case(model, batch_size, args)
+        print(
+            f"{r['batch_size']:>5} {r['throughput']:>8.2f} {r['p50_ms']:>9.1f} "
+            f"{r['p99_ms']:>9.1f} {r['mean_ms']:>9.1f} {r['avg_batch']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--resolution", type=int, default=518)
+    parser.add_argument("--threads", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Weekly report PDF rendering benchmark.
+
+Renders a representative report in-process (1 core), then through a
+ProcessPoolExecutor with 1..N workers like ReportPdfService, and reports
+renders/second overall and per worker.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_render --renders 200 --workers 1 2 4
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.report_pdf import render_report_pdf
+
+
+def sample_payload() -> dict:
+    return {
+        "week_start": "2024-05-06",
+        "week_end": "2024-05-12",
+        "report_title": "Week of Progress: Your Eczema Journey",
+        "condition_summary": (
+            "Your eczema was stable this week with slightly lower severity on the "
+            "last three days. Confidence in the classification stayed high."
+        ),
+        "key_insights": [
+            {
+                "title": f"Insight {i}",
+                "description": "Redness decreased on the inner elbow compared to last week. " * 3,
+                "severity": ("positive", "neutral", "negative")[i % 3],
+                "icon": "📈",
+            }
+            for i in range(5)
+        ],
+        "recommendations": [
+            {
+                "category": "treatment",
+                "action": f"Recommendation {i}: keep moisturizing twice daily",
+                "priority": ("high", "medium", "low")[i % 3],
+                "reasoning": "A consistent barrier routine reduces flare-ups. " * 2,
+            }
+            for i in range(5)
+        ],
+        "metrics_interpretation": "You uploaded images on 5 of 7 days. " * 4,
+        "next_steps": "Keep photographing the same area in consistent lighting.",
+        "metrics": {
+            "average_severity": 41.5,
+            "average_confidence": 0.86,
+            "improvement_vs_last_week": 12.5,
+            "total_images_uploaded": 9,
+            "consistent_tracking": True,
+            "days_tracked": 5,
+        },
+    }
+
+
+def bench_inline(payload, renders):
+    render_report_pdf(payload)  # Warm-up (imports, font metrics)
+    start = time.perf_counter()
+    for _ in range(renders):
+        size = len(render_report_pdf(payload))
+    return renders / (time.perf_counter() - start), size
+
+
+def bench_pool(payload, renders, workers):
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        # Warm every worker before timing
+        list(pool.map(render_report_pdf, [payload] * workers))
+        start = time.perf_counter()
+        list(pool.map(render_report_pdf, [payload] * renders, chunksize=1))
+        return renders / (time.perf_counter() - start)
+
+
+def main(args):
+    payload = sample_payload()
+
+    rate, size = bench_inline(payload, args.renders)
+    print(f"{os.cpu_count()} CPUs, {args.renders} renders, PDF size {size / 1024:.1f} KiB")
+    print(f"{'mode':>8} {'workers':>8} {'renders/s':>10} {'per worker':>11}")
+    print(f"{'inline':>8} {1:>8} {rate:>10.1f} {rate:>11.1f}")
+
+    for workers in args.workers:
+        rate = bench_pool(payload, args.renders, workers)
+        print(f"{'pool':>8} {workers:>8} {rate:>10.1f} {rate / workers:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+"""
+Resolution-profile benchmark for the DINOv2 skin classifier.
+
+For every profile reports patch tokens, per-image latency (batch 1 and
+batched) and top-1 agreement / mean probability delta against the 518px
+baseline on the sample uploads.
+
+Usage (from backend/):
+    python -m benchmarks.resolution --batch-size 8
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from app.models.transforms import PATCH_SIZE, RESOLUTION_PROFILES, get_transform
+from benchmarks.batching import build_model
+
+SAMPLE_IMAGES_DIR = "uploads/skin_images"
+
+
+def load_images(images_dir):
+    paths = sorted(
+        p for p in glob.glob(os.path.join(images_dir, "*"))
+        if p.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    )
+    if not paths:
+        raise FileNotFoundError(f"No sample images found in {images_dir}")
+    return [Image.open(p).convert("RGB") for p in paths]
+
+
+def predict(model, images, resolution, batch_size):
+    transform = get_transform(resolution)
+    tensors = [transform(img) for img in images]
+    probs = []
+
+    with torch.inference_mode():
+        # Batch-1 latency
+        start = time.perf_counter()
+        for tensor in tensors:
+            probs.append(F.softmax(model(tensor.unsqueeze(0)), dim=1)[0])
+        single_ms = (time.perf_counter() - start) / len(tensors) * 1000
+
+        # Batched latency
+        start = time.perf_counter()
+        for i in range(0, len(tensors), batch_size):
+            model(torch.stack(tensors[i:i + batch_size]))
+        batched_ms = (time.perf_counter() - start) / len(tensors) * 1000
+
+    return torch.stack(probs), single_ms, batched_ms
+
+
+def main(args):
+    model = build_model()
+    images = load_images(args.images_dir)
+
+    # Warm-up
+    with torch.inference_mode():
+        model(torch.randn(1, 3, 224, 224))
+
+    results = {
+        name: predict(model, images, res, args.batch_size)
+        for name, res in RESOLUTION_PROFILES.items()
+    }
+    baseline = results["accurate"][0]
+
+    print(f"{len(images)} images, batch size {args.batch_size}, threads {torch.get_num_threads()}")
+    print(
+        f"{'profile':>9} {'res':>5} {'tokens':>7} {'ms/img b1':>10} "
+        f"{'ms/img bN':>10} {'top1 agree':>11} {'mean |Δp|':>10}"
+    )
+    for name, (probs, single_ms, batched_ms) in results.items():
+        res = RESOLUTION_PROFILES[name]
+        agreement = (probs.argmax(1) == baseline.argmax(1)).float().mean().item()
+        delta = (probs - baseline).abs().mean().item()
+        print(
+            f"{name:>9} {res:>5} {(res // PATCH_SIZE) ** 2:>7} {single_ms:>10.1f} "
+            f"{batched_ms:>10.1f} {agreement:>11.2%} {delta:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--images-dir", default=SAMPLE_IMAGES_DIR)
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""
+Per-worker memory report for copy vs mmap weight loading.
+
+Starts N worker processes (like N uvicorn workers) that each load the
+model and run one forward, then reports RSS / PSS / USS per worker while
+they are all alive. PSS splits shared pages between processes, so it is
+the number that shows the page-cache sharing of mmap mode.
+
+Linux only (reads /proc/self/smaps_rollup).
+
+Usage (from backend/):
+    python -m app.models.convert_weights      # once, for mmap mode
+    python -m benchmarks.worker_rss --workers 4
+"""
+
+import argparse
+import multiprocessing as mp
+
+
+def read_memory_mb() -> dict:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def worker(mode, loaded, release, results):
+    import torch
+
+    from app.models.model import load_model
+
+    torch.set_num_threads(1)
+    before = read_memory_mb()
+
+    model = load_model("torch", weights_mode=mode)
+    with torch.inference_mode():
+        model(torch.zeros(1, 3, 224, 224))
+
+    # Measure only once every worker holds its model
+    loaded.wait()
+    after = read_memory_mb()
+    results.put({"mode": mode, "before": before, "after": after})
+    release.wait()
+
+
+def run_mode(ctx, mode, workers):
+    loaded = ctx.Barrier(workers)
+    release = ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+
+    procs = [
+        ctx.Process(target=worker, args=(mode, loaded, release, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    rows = [results.get() for _ in procs]
+    release.wait()
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main(args):
+    ctx = mp.get_context("spawn")
+
+    print(f"{'mode':>5} {'worker':>6} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8} {'Δ RSS':>8}")
+    for mode in args.modes:
+        rows = run_mode(ctx, mode, args.workers)
+        for i, row in enumerate(rows):
+            a, b = row["after"], row["before"]
+            print(
+                f"{mode:>5} {i:>6} {a['rss']:>8.0f} {a['pss']:>8.0f} "
+                f"{a['uss']:>8.0f} {a['rss'] - b['rss']:>8.0f}"
+            )
+        total_pss = sum(r["after"]["pss"] for r in rows)
+        print(f"{mode:>5} {'total':>6} {'':>8} {total_pss:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["copy", "mmap"])
+    main(parser.parse_args())
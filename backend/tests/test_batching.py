@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.models.batching import MicroBatcher
+
+
+class RecordingForward:
+    """forward_fn that records each batch it was called with."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, items):
+        with self._lock:
+            self.batches.append(list(items))
+        if self.fail:
+            raise RuntimeError("forward pass failed")
+        return [item * 10 for item in items]
+
+
+def test_flushes_when_batch_is_full():
+    forward = RecordingForward()
+    # A long wait: only the size limit can flush these batches in time
+    batcher = MicroBatcher(forward, max_batch_size=4, max_wait_ms=5000)
+
+    async def run():
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i) for i in range(8))), 2
+            )
+        finally:
+            await batcher.close()
+
+    assert asyncio.run(run()) == [i * 10 for i in range(8)]
+    assert [len(batch) for batch in forward.batches] == [4, 4]
+    assert batcher.stats()["batches_run"] == 2
+    assert batcher.stats()["items_processed"] == 8
+
+
+def test_flushes_partial_batch_after_max_wait():
+    forward = RecordingForward()
+    batcher = MicroBatcher(forward, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(batcher.submit(1), batcher.submit(2)), 2
+            )
+        finally:
+            await batcher.close()
+
+    assert asyncio.run(run()) == [10, 20]
+    assert forward.batches == [[1, 2]]
+
+
+def test_forward_error_reaches_every_waiter():
+    forward = RecordingForward(fail=True)
+    batcher = MicroBatcher(forward, max_batch_size=3, max_wait_ms=20)
+
+    async def run():
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(i) for i in range(3)), return_exceptions=True
+            )
+        finally:
+            await batcher.close()
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert forward.batches == [[0, 1, 2]]
+
+
+def test_keeps_serving_after_a_failed_batch():
+    forward = RecordingForward(fail=True)
+    batcher = MicroBatcher(forward, max_batch_size=2, max_wait_ms=5)
+
+    async def run():
+        try:
+            with pytest.raises(RuntimeError):
+                await batcher.submit(1)
+            forward.fail = False
+            return await batcher.submit(2)
+        finally:
+            await batcher.close()
+
+    assert asyncio.run(run()) == 20
+
+
+def test_skips_callers_that_gave_up():
+    forward = RecordingForward()
+    batcher = MicroBatcher(forward, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        try:
+            abandoned = asyncio.ensure_future(batcher.submit(1))
+            await asyncio.sleep(0)
+            abandoned.cancel()
+            return await batcher.submit(2)
+        finally:
+            await batcher.close()
+
+    assert asyncio.run(run()) == 20
+    assert forward.batches == [[2]]
+
+
+def test_rejects_empty_batches():
+    with pytest.raises(ValueError, match="max_batch_size"):
+        MicroBatcher(RecordingForward(), max_batch_size=0)
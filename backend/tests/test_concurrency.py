@@ -0,0 +1,89 @@
+import asyncio
+
+from app.utils.concurrency import bounded_as_completed, bounded_gather
+
+
+class Tracker:
+    """Coroutine factories that record how many run at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.started = 0
+        self.cancelled = 0
+
+    def call(self, value, delay: float = 0.01, error: Exception = None):
+        async def run():
+            self.started += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            try:
+                await asyncio.sleep(delay)
+                if error is not None:
+                    raise error
+                return value
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            finally:
+                self.active -= 1
+
+        return run
+
+
+def test_never_exceeds_concurrency():
+    tracker = Tracker()
+    calls = [tracker.call(i) for i in range(10)]
+
+    outcomes = asyncio.run(bounded_gather(calls, concurrency=3))
+
+    assert [o["result"] for o in outcomes] == list(range(10))
+    assert tracker.peak == 3
+
+
+def test_yields_in_completion_order():
+    tracker = Tracker()
+    calls = [tracker.call("slow", delay=0.05), tracker.call("fast", delay=0.001)]
+
+    async def run():
+        return [o["index"] async for o in bounded_as_completed(calls, concurrency=2)]
+
+    assert asyncio.run(run()) == [1, 0]
+
+
+def test_errors_and_timeouts_become_outcomes():
+    tracker = Tracker()
+    calls = [
+        tracker.call("ok"),
+        tracker.call(None, error=ValueError("vision API down")),
+        tracker.call(None, delay=1),
+    ]
+
+    outcomes = asyncio.run(bounded_gather(calls, concurrency=3, timeout=0.1))
+
+    assert outcomes[0] == {"index": 0, "result": "ok", "error": None}
+    assert outcomes[1]["result"] is None
+    assert outcomes[1]["error"] == "vision API down"
+    assert outcomes[2]["result"] is None
+    assert "Timed out" in outcomes[2]["error"]
+
+
+def test_early_exit_cancels_pending_calls():
+    tracker = Tracker()
+    calls = [tracker.call(0, delay=0.001)] + [tracker.call(i, delay=1) for i in range(1, 6)]
+
+    async def run():
+        stream = bounded_as_completed(calls, concurrency=2)
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0)  # Let the cancellations land
+        # Checked inside the loop: asyncio.run would cancel leftovers anyway
+        return first, tracker.active, tracker.started, tracker.cancelled
+
+    first, active, started, cancelled = asyncio.run(run())
+
+    assert first["index"] == 0
+    assert active == 0
+    # Only calls that got past the semaphore ever started; all were cancelled
+    assert started >= 2
+    assert cancelled == started - 1
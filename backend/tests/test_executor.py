@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.models.executor import InferenceExecutor
+
+
+@pytest.fixture
+def executor():
+    pool = InferenceExecutor(max_workers=1)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_runs_off_the_event_loop(executor):
+    async def run():
+        loop_thread = threading.get_ident()
+        worker_thread = await executor.run(threading.get_ident)
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(run())
+    assert worker_thread != loop_thread
+
+
+def test_passes_arguments_and_results(executor):
+    async def run():
+        return await executor.run(sorted, [3, 1, 2], reverse=True)
+
+    assert asyncio.run(run()) == [3, 2, 1]
+    assert executor.stats()["completed"] == 1
+
+
+def test_counts_failures_and_reraises(executor):
+    def boom():
+        raise ValueError("bad image")
+
+    async def run():
+        with pytest.raises(ValueError, match="bad image"):
+            await executor.run(boom)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["failed"] == 1
+    assert stats["running"] == 0
+
+
+def test_tracks_queue_depth_while_workers_are_busy(executor):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(2)
+
+    first = executor.submit(blocker)
+    started.wait(2)
+    queued = executor.submit(lambda: None)
+
+    stats = executor.stats()
+    assert stats["running"] == 1
+    assert stats["queue_depth"] == 1
+
+    release.set()
+    first.result(2)
+    queued.result(2)
+    stats = executor.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["completed"] == 2
+
+
+def test_cancelled_task_leaves_the_queue(executor):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(2)
+
+    first = executor.submit(blocker)
+    started.wait(2)
+    queued = executor.submit(lambda: None)
+    assert queued.cancel()
+
+    assert executor.stats()["queue_depth"] == 0
+    release.set()
+    first.result(2)
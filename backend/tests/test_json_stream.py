@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import TopLevelJSONStream
+
+REPORT = {
+    "report_title": "Week 3: {steady} progress",
+    "condition_summary": 'Eczema patches look calmer; you wrote "itchy at night" twice.',
+    "key_insights": ["Fewer flare-ups", "Mood [better] on rest days", {"note": "a } b"}],
+    "metrics": {"days": 4, "score": 41.5, "nested": [[1, 2], {"x": None}]},
+    "path": "C:\\photos\\week3",
+    "consistent": True,
+    "previous": None,
+    "delta": -12,
+}
+
+
+def feed_all(chunks):
+    parser = TopLevelJSONStream()
+    pairs = []
+    for chunk in chunks:
+        pairs.extend(parser.feed(chunk))
+    return parser, pairs
+
+
+def test_single_chunk():
+    parser, pairs = feed_all([json.dumps(REPORT)])
+    assert dict(pairs) == REPORT
+    assert [key for key, _ in pairs] == list(REPORT)
+    assert parser.complete
+
+
+def test_one_character_at_a_time():
+    parser, pairs = feed_all(list(json.dumps(REPORT, indent=2)))
+    assert dict(pairs) == REPORT
+    assert parser.complete
+
+
+@pytest.mark.parametrize("split", range(1, 60))
+def test_any_split_point(split):
+    text = json.dumps(REPORT)
+    _, pairs = feed_all([text[:split], text[split:]])
+    assert dict(pairs) == REPORT
+
+
+def test_emits_each_value_once_complete():
+    parser = TopLevelJSONStream()
+    assert parser.feed('{"title": "Wee') == []
+    assert parser.feed('k 3", "items": [1') == [("title", "Week 3")]
+    assert parser.feed(', 2]}') == [("items", [1, 2])]
+    assert parser.complete
+
+
+def test_braces_and_brackets_inside_strings():
+    _, pairs = feed_all(['{"a": "}{][", "b": ', '"{\\"x\\": 1}"}'])
+    assert pairs == [("a", "}{]["), ("b", '{"x": 1}')]
+
+
+def test_escaped_quote_split_across_chunks():
+    # The backslash ends one chunk, the escaped quote starts the next
+    _, pairs = feed_all(['{"quote": "she said \\', '"hi\\"", "n": 1}'])
+    assert pairs == [("quote", 'she said "hi"'), ("n", 1)]
+
+
+def test_escaped_backslash_before_closing_quote():
+    _, pairs = feed_all(['{"path": "C:\\\\"', ', "next": "}"}'])
+    assert pairs == [("path", "C:\\"), ("next", "}")]
+
+
+def test_ignores_code_fence_and_trailing_text():
+    parser, pairs = feed_all(['```json\n{"a": 1', '}\n```', '{"b": 2}'])
+    assert pairs == [("a", 1)]
+    assert parser.complete
+
+
+def test_incomplete_stream_is_not_complete():
+    parser, pairs = feed_all(['{"a": 1, "b": [1, 2'])
+    assert pairs == [("a", 1)]
+    assert not parser.complete
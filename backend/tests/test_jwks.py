@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.auth import clerk, jwks
+from app.auth.jwks import JWKSCache, JWKSError, static_jwks_fetcher
+
+ISSUER = "https://dermora.clerk.accounts.dev"
+
+
+class LocalKey:
+    """RSA key pair standing in for one of Clerk's signing keys."""
+
+    def __init__(self, kid: str):
+        self.kid = kid
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        self.public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+
+    def token(self, sub: str = "user_123", issuer: str = ISSUER) -> str:
+        claims = {"sub": sub, "iss": issuer, "exp": int(time.time()) + 300}
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+class CountingFetcher:
+    """static_jwks_fetcher that counts calls and can be switched to failing."""
+
+    def __init__(self, jwks_by_issuer):
+        self.jwks_by_issuer = jwks_by_issuer
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self, issuer):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("JWKS endpoint unreachable")
+        return await static_jwks_fetcher(self.jwks_by_issuer)(issuer)
+
+
+@pytest.fixture
+def key():
+    return LocalKey("key-1")
+
+
+@pytest.fixture
+def use_cache(monkeypatch):
+    """Make verify_clerk_token use the given cache."""
+    def install(cache):
+        monkeypatch.setattr(jwks, "_cache", cache)
+        return cache
+    return install
+
+
+def verify(token):
+    return asyncio.run(clerk.verify_clerk_token(token))
+
+
+def test_valid_token_is_verified_from_cached_keys(key, use_cache):
+    fetcher = CountingFetcher({ISSUER: {"keys": [key.public_jwk]}})
+    use_cache(JWKSCache([ISSUER], fetcher=fetcher))
+
+    assert verify(key.token())["sub"] == "user_123"
+    assert verify(key.token(sub="user_456"))["sub"] == "user_456"
+    # Second verification is local: no new fetch
+    assert fetcher.calls == 1
+
+
+def test_unknown_kid_refreshes_keys(key, use_cache):
+    rotated = LocalKey("key-2")
+    key_set = {"keys": [key.public_jwk]}
+    fetcher = CountingFetcher({ISSUER: key_set})
+    cache = use_cache(JWKSCache([ISSUER], min_refresh_interval_s=0, fetcher=fetcher))
+
+    verify(key.token())
+    key_set["keys"] = [key.public_jwk, rotated.public_jwk]  # Clerk rotates
+
+    assert verify(rotated.token())["sub"] == "user_123"
+    assert fetcher.calls == 2
+    assert cache.stats()["rotations"] == 1
+
+
+def test_unknown_kid_refresh_is_rate_limited(key, use_cache):
+    fetcher = CountingFetcher({ISSUER: {"keys": [key.public_jwk]}})
+    use_cache(JWKSCache([ISSUER], min_refresh_interval_s=60, fetcher=fetcher))
+
+    verify(key.token())
+    with pytest.raises(Exception, match="Unknown signing key"):
+        verify(LocalKey("key-forged").token())
+    assert fetcher.calls == 1
+
+
+@pytest.mark.parametrize("issuer", [
+    "https://clerk.attacker.com",
+    "https://evil-app.clerk.accounts.dev",
+    ISSUER + ".attacker.com",
+])
+def test_issuer_not_in_allowlist_is_rejected(issuer, use_cache):
+    attacker = LocalKey("key-1")
+    fetcher = CountingFetcher({issuer: {"keys": [attacker.public_jwk]}})
+    use_cache(JWKSCache([ISSUER], fetcher=fetcher))
+
+    with pytest.raises(Exception, match="Issuer not allowed"):
+        verify(attacker.token(issuer=issuer))
+    # Attacker-chosen URLs are never fetched
+    assert fetcher.calls == 0
+
+
+def test_empty_allowlist_rejects_every_token(key, use_cache):
+    fetcher = CountingFetcher({ISSUER: {"keys": [key.public_jwk]}})
+    use_cache(JWKSCache([], fetcher=fetcher))
+
+    with pytest.raises(Exception, match="Issuer not allowed"):
+        verify(key.token())
+    assert fetcher.calls == 0
+
+
+def test_failed_refresh_keeps_cached_keys(key, use_cache):
+    fetcher = CountingFetcher({ISSUER: {"keys": [key.public_jwk]}})
+    # ttl 0: every lookup tries to refresh
+    use_cache(JWKSCache([ISSUER], ttl_s=0, refresh_after_s=0, fetcher=fetcher))
+
+    verify(key.token())
+    fetcher.fail = True
+
+    assert verify(key.token())["sub"] == "user_123"
+    assert fetcher.calls == 2
+
+
+def test_failed_first_fetch_raises(key):
+    fetcher = CountingFetcher({ISSUER: {"keys": [key.public_jwk]}})
+    fetcher.fail = True
+    cache = JWKSCache([ISSUER], fetcher=fetcher)
+
+    with pytest.raises(JWKSError, match="Could not fetch JWKS"):
+        asyncio.run(cache.get_key(ISSUER, "key-1"))
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+
+from app.utils.llm_governor import CircuitOpenError, OutboundGovernor  # noqa: E402
+
+RESET_S = 0.05
+
+
+class FakeDeployment:
+    """Zero-arg coroutine factories standing in for Azure requests."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def failing(self):
+        async def call():
+            self.calls += 1
+            raise asyncio.TimeoutError()
+        return call
+
+    def ok(self, value="ok"):
+        async def call():
+            self.calls += 1
+            return value
+        return call
+
+    def blocked(self, release: asyncio.Event):
+        async def call():
+            self.calls += 1
+            await release.wait()
+            return "late"
+        return call
+
+
+@pytest.fixture
+def governor():
+    return OutboundGovernor("test", max_retries=0, failure_threshold=2, reset_timeout_s=RESET_S)
+
+
+async def trip(governor, deployment):
+    for _ in range(governor.failure_threshold):
+        with pytest.raises(asyncio.TimeoutError):
+            await governor.call(deployment.failing())
+
+
+def test_opens_after_consecutive_failures(governor):
+    deployment = FakeDeployment()
+
+    async def run():
+        await trip(governor, deployment)
+        assert governor.state == "open"
+        assert governor.is_open()
+        with pytest.raises(CircuitOpenError):
+            await governor.call(deployment.ok())
+
+    asyncio.run(run())
+    assert deployment.calls == 2  # The short-circuited call never reached Azure
+    assert governor.stats()["breaker_trips"] == 1
+    assert governor.stats()["short_circuited"] == 1
+
+
+def test_non_transient_errors_do_not_trip(governor):
+    async def bad_request():
+        raise ValueError("content filtered")
+
+    async def run():
+        for _ in range(governor.failure_threshold + 1):
+            with pytest.raises(ValueError):
+                await governor.call(bad_request)
+
+    asyncio.run(run())
+    assert governor.state == "closed"
+
+
+def test_successful_probe_closes(governor):
+    deployment = FakeDeployment()
+
+    async def run():
+        await trip(governor, deployment)
+        await asyncio.sleep(RESET_S * 1.5)
+        assert governor.state == "half_open"
+        assert not governor.is_open()
+        return await governor.call(deployment.ok("probe"))
+
+    assert asyncio.run(run()) == "probe"
+    assert governor.state == "closed"
+
+
+def test_failed_probe_reopens(governor):
+    deployment = FakeDeployment()
+
+    async def run():
+        await trip(governor, deployment)
+        await asyncio.sleep(RESET_S * 1.5)
+        # A probe fails on its first error, whatever max_retries says
+        with pytest.raises(asyncio.TimeoutError):
+            await governor.call(deployment.failing())
+
+    asyncio.run(run())
+    assert governor.state == "open"
+    assert governor.stats()["breaker_trips"] == 2
+
+
+def test_only_one_probe_at_a_time(governor):
+    deployment = FakeDeployment()
+
+    async def run():
+        await trip(governor, deployment)
+        await asyncio.sleep(RESET_S * 1.5)
+
+        release = asyncio.Event()
+        probe = asyncio.ensure_future(governor.call(deployment.blocked(release)))
+        await asyncio.sleep(0)
+        assert governor.is_open()
+        with pytest.raises(CircuitOpenError):
+            await governor.call(deployment.ok())
+
+        release.set()
+        return await probe
+
+    assert asyncio.run(run()) == "late"
+    assert governor.state == "closed"
+
+
+def test_cancelled_probe_lets_the_next_call_probe(governor):
+    deployment = FakeDeployment()
+
+    async def run():
+        await trip(governor, deployment)
+        await asyncio.sleep(RESET_S * 1.5)
+
+        probe = asyncio.ensure_future(governor.call(deployment.blocked(asyncio.Event())))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        # Neither success nor failure: still half-open, and not stuck
+        assert governor.state == "half_open"
+        assert not governor.is_open()
+        return await governor.call(deployment.ok("second probe"))
+
+    assert asyncio.run(run()) == "second probe"
+    assert governor.state == "closed"
@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("asyncpg")
+
+from app.utils.singleflight import SingleFlight, StreamFlight, advisory_lock_key  # noqa: E402
+
+
+class CountingCall:
+    """Zero-arg coroutine factory that waits for `release` before finishing."""
+
+    def __init__(self, result=None, error: Exception = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+
+    async def run():
+        fn = CountingCall(result={"report_id": 1})
+        callers = [asyncio.ensure_future(flight.do("week", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.running("week") is not None
+        fn.release.set()
+        results = await asyncio.gather(*callers)
+        return fn.calls, results
+
+    calls, results = asyncio.run(run())
+    assert calls == 1
+    assert results == [{"report_id": 1}] * 3
+    assert flight.stats() == {"runs": 1, "joined": 2, "in_flight": 0}
+
+
+def test_concurrent_callers_share_the_exception():
+    flight = SingleFlight()
+
+    async def run():
+        fn = CountingCall(error=RuntimeError("LLM unavailable"))
+        callers = [asyncio.ensure_future(flight.do("week", fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+        fn.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        return fn.calls, results
+
+    calls, results = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_key_is_released_after_the_run():
+    flight = SingleFlight()
+
+    async def run():
+        first = CountingCall(result=1)
+        first.release.set()
+        second = CountingCall(result=2)
+        second.release.set()
+        return await flight.do("week", first), await flight.do("week", second)
+
+    # The second call starts a fresh run instead of reusing the finished one
+    assert asyncio.run(run()) == (1, 2)
+    assert flight.running("week") is None
+    assert flight.stats()["runs"] == 2
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def run():
+        a, b = CountingCall(result="a"), CountingCall(result="b")
+        a.release.set()
+        b.release.set()
+        return await asyncio.gather(flight.do("a", a), flight.do("b", b))
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+
+def test_cancelled_caller_does_not_cancel_the_run():
+    flight = SingleFlight()
+
+    async def run():
+        fn = CountingCall(result="stored")
+        leaving = asyncio.ensure_future(flight.do("week", fn))
+        staying = asyncio.ensure_future(flight.do("week", fn))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        fn.release.set()
+        return await staying, leaving.cancelled()
+
+    assert asyncio.run(run()) == ("stored", True)
+
+
+def test_advisory_lock_key_is_stable_signed_64_bit():
+    key = advisory_lock_key("weekly-report:user:2024-01-01")
+    assert key == advisory_lock_key("weekly-report:user:2024-01-01")
+    assert key != advisory_lock_key("weekly-report:user:2024-01-08")
+    assert -(2 ** 63) <= key < 2 ** 63
+
+
+class SectionProducer:
+    """StreamFlight producer emitting `events`, pausing on `release` halfway."""
+
+    def __init__(self, events, error: Exception = None):
+        self.events = events
+        self.error = error
+        self.runs = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, emit):
+        self.runs += 1
+        half = len(self.events) // 2
+        for event in self.events[:half]:
+            emit(event)
+        await self.release.wait()
+        for event in self.events[half:]:
+            emit(event)
+        if self.error is not None:
+            raise self.error
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_late_subscriber_replays_then_follows():
+    flight = StreamFlight()
+    producer = SectionProducer(["title", "summary", "insights", "done"])
+
+    async def run():
+        first = asyncio.ensure_future(collect(flight.subscribe("week", producer)))
+        await asyncio.sleep(0.01)  # First half emitted, producer paused
+        late = asyncio.ensure_future(collect(flight.subscribe("week", producer)))
+        producer.release.set()
+        return await first, await late
+
+    first, late = asyncio.run(run())
+    assert first == late == ["title", "summary", "insights", "done"]
+    assert producer.runs == 1
+    assert flight.stats() == {"runs": 1, "joined": 1, "in_flight": 0}
+
+
+def test_run_survives_subscribers_leaving():
+    flight = StreamFlight()
+    producer = SectionProducer(["a", "b"])
+
+    async def run():
+        leaving = flight.subscribe("week", producer)
+        assert await leaving.__anext__() == "a"
+        await leaving.aclose()
+        producer.release.set()
+        await asyncio.sleep(0.01)
+        return flight.stats()["in_flight"]
+
+    assert asyncio.run(run()) == 0
+    assert producer.runs == 1
+
+
+def test_producer_error_ends_every_stream():
+    flight = StreamFlight()
+    producer = SectionProducer(["a", "b"], error=RuntimeError("bug"))
+
+    async def run():
+        streams = [flight.subscribe("week", producer) for _ in range(2)]
+        producer.release.set()
+        return await asyncio.gather(*(collect(s) for s in streams))
+
+    assert asyncio.run(run()) == [["a", "b"], ["a", "b"]]
+    assert flight.stats()["in_flight"] == 0
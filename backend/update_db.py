@@ -4,8 +4,23 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 from dotenv import load_dotenv
 
+from app.entities.base import Base
+from app.entities.prediction_cache import SkinPredictionCache
+from app.entities.skin_image import SkinImage  # noqa: F401  (FK target)
+from app.entities.skin_embedding import SkinEmbedding
+from app.entities.skin_vision_analysis import SkinVisionAnalysis
+from app.entities.vision_response_cache import VisionResponseCache
+
 load_dotenv()
 
+# Tables added after the initial schema (created if missing)
+NEW_TABLES = [
+    SkinPredictionCache.__table__,
+    SkinEmbedding.__table__,
+    SkinVisionAnalysis.__table__,
+    VisionResponseCache.__table__,
+]
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     print("DATABASE_URL not found!")
@@ -14,27 +29,100 @@ if not DATABASE_URL:
 async def update_schema():
     engine = create_async_engine(DATABASE_URL)
     async with engine.begin() as conn:
+        # Each step runs in its own savepoint: on Postgres a failed statement
+        # aborts the whole transaction, so without it one failing step would
+        # make every later step fail and roll everything back
         print("Adding phone_number column...")
         try:
-            await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS phone_number TEXT UNIQUE;"))
-            print("phone_number added.")
+            async with conn.begin_nested():
+                await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS phone_number TEXT UNIQUE;"))
+                print("phone_number added.")
         except Exception as e:
             print(f"Error adding phone_number: {e}")
 
         print("Altering email column...")
         try:
-            await conn.execute(text("ALTER TABLE users ALTER COLUMN email DROP NOT NULL;"))
-            print("email made nullable.")
+            async with conn.begin_nested():
+                await conn.execute(text("ALTER TABLE users ALTER COLUMN email DROP NOT NULL;"))
+                print("email made nullable.")
         except Exception as e:
             print(f"Error altering email: {e}")
 
         print("Altering google_sub column...")
         try:
-            await conn.execute(text("ALTER TABLE users ALTER COLUMN google_sub DROP NOT NULL;"))
-            print("google_sub made nullable.")
+            async with conn.begin_nested():
+                await conn.execute(text("ALTER TABLE users ALTER COLUMN google_sub DROP NOT NULL;"))
+                print("google_sub made nullable.")
         except Exception as e:
             print(f"Error altering google_sub: {e}")
 
+        print("Adding skin_prediction_cache.embedding / probabilities columns...")
+        try:
+            async with conn.begin_nested():
+                await conn.execute(text("ALTER TABLE IF EXISTS skin_prediction_cache ADD COLUMN IF NOT EXISTS embedding BYTEA;"))
+                await conn.execute(text("ALTER TABLE IF EXISTS skin_prediction_cache ADD COLUMN IF NOT EXISTS probabilities JSONB;"))
+                print("embedding / probabilities added.")
+        except Exception as e:
+            print(f"Error adding embedding: {e}")
+
+        print("Adding weekly_reports rendering columns...")
+        try:
+            async with conn.begin_nested():
+                for column in ("report_title", "metrics_interpretation", "next_steps"):
+                    await conn.execute(text(f"ALTER TABLE weekly_reports ADD COLUMN IF NOT EXISTS {column} TEXT;"))
+                print("weekly_reports columns added.")
+        except Exception as e:
+            print(f"Error adding weekly_reports columns: {e}")
+
+        print("Deduplicating weekly_reports...")
+        try:
+            async with conn.begin_nested():
+                # Keep the newest report per (user, week), then enforce uniqueness
+                await conn.execute(text("""
+                    DELETE FROM weekly_reports a
+                    USING weekly_reports b
+                    WHERE a.user_id = b.user_id
+                      AND a.week_start = b.week_start
+                      AND (a.created_at, a.id) < (b.created_at, b.id);
+                """))
+                await conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_weekly_reports_user_week "
+                    "ON weekly_reports (user_id, week_start);"
+                ))
+                print("weekly_reports unique index created.")
+        except Exception as e:
+            print(f"Error deduplicating weekly_reports: {e}")
+
+        print("Creating new tables...")
+        try:
+            async with conn.begin_nested():
+                await conn.run_sync(Base.metadata.create_all, tables=NEW_TABLES)
+                print("New tables created.")
+        except Exception as e:
+            print(f"Error creating tables: {e}")
+
+        print("Adding skin_vision_analyses.updated_at column...")
+        try:
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    "ALTER TABLE skin_vision_analyses "
+                    "ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();"
+                ))
+                print("updated_at added.")
+        except Exception as e:
+            print(f"Error adding updated_at: {e}")
+
+        print("Indexing skin_prediction_cache.created_at...")
+        try:
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_skin_prediction_cache_created_at "
+                    "ON skin_prediction_cache (created_at);"
+                ))
+                print("skin_prediction_cache index created.")
+        except Exception as e:
+            print(f"Error indexing skin_prediction_cache: {e}")
+
     await engine.dispose()
 
 if __name__ == "__main__":